@@ -0,0 +1,174 @@
+import argparse
+
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from loaders import SCHEMAS, load_porometre
+from pipelines import compute_growth, compute_transpiration
+
+'''
+    Alignement des trois instruments sur une base de temps commune.
+
+    Les balances (pas de 10 min), les encodeurs (pas de 1 à 10 min selon les
+    années) et le poromètre (mesures manuelles, à des dates quelconques) sont
+    ramenés sur la même grille : les multiples de `base` (e.g., toutes les
+    heures). Pour chaque date de la grille :
+        - balances et encodeurs : moyenne des vitesses (voir
+          pipelines.compute_transpiration et compute_growth) sur la fenêtre
+          de durée `base` centrée sur cette date ;
+        - poromètre : chaque mesure est associée à la date de la grille la
+          plus proche (pd.merge_asof, direction='nearest'), à condition d'en
+          être à moins de `tolerance`, puis les mesures associées à une même
+          date sont moyennées.
+
+    Le résultat est un tableau long, une ligne par (année, date, variable,
+    série) :
+        - 'transpiration' [g/h], une série par plante ;
+        - 'elongation' [cm/h], une série par encodeur ;
+        - 'cond' [mmol/m²/s] et 'PAR' [µmol/m²/s], une série par face de la
+          feuille ;
+    avec la colonne 'n', le nombre d'échantillons moyennés.
+
+    wide() en fait un tableau avec une ligne par (année, date) et une
+    colonne par variable, e.g. pour comparer à la même heure la vitesse
+    d'élongation, la vitesse de transpiration et la conductance stomatique.
+
+    Utilisation : python align.py --years 2025 2026 --base 1h --out alignement.csv
+'''
+
+BASE = '1h'
+
+# Instrument -> (calcul, résultat utilisé, nom de la variable)
+SERIES = {
+    'balances': (compute_transpiration, 'vitesse', 'transpiration'),
+    'croissance': (compute_growth, 'vitesse', 'elongation'),
+    }
+
+POROMETRE = ['cond', 'PAR']
+
+COLUMNS = ['annee', 'time', 'instrument', 'variable', 'serie', 'valeur', 'n']
+
+def campaigns():
+    return sorted({year for years in SCHEMAS.values() for year in years})
+
+'''
+    Moyenne et nombre d'échantillons (non NaN) de chaque colonne de df sur
+    les fenêtres [t - base/2, t + base/2[, pour t multiple de `base`.
+'''
+def windowed(df, base=BASE):
+    base = pd.Timedelta(base)
+
+    # Décaler les dates de base/2 transforme les intervalles de resample
+    # ([t, t + base[) en fenêtres centrées sur t
+    windows = df.set_axis(df.index + base / 2).resample(base)
+
+    return windows.mean(), windows.count()
+
+'''
+    Tableau long (voir COLUMNS) à partir de la moyenne et du nombre
+    d'échantillons, indexés par la date, une colonne par série.
+'''
+def _tidy(mean, count):
+    names = {'index': 'time', 'columns': 'serie'}
+    long = pd.DataFrame({'valeur': mean.rename_axis(**names).stack(),
+                         'n': count.rename_axis(**names).stack()})
+
+    return long[long['n'] > 0].reset_index()
+
+def _regular(year, instrument, base):
+    compute, key, variable = SERIES[instrument]
+
+    long = _tidy(*windowed(compute(year)[key], base))
+    long['instrument'] = instrument
+    long['variable'] = variable
+
+    return long
+
+def _porometre(year, base, tolerance):
+    base = pd.Timedelta(base)
+    tolerance = base / 2 if tolerance is None else pd.Timedelta(tolerance)
+
+    df = load_porometre(year).dropna(subset=['time']).sort_values('time')
+
+    grid = pd.DataFrame({'grille': pd.date_range(df['time'].iloc[0].floor(base),
+                                                 df['time'].iloc[-1].ceil(base),
+                                                 freq=base, unit=df['time'].dt.unit)})
+
+    df = pd.merge_asof(df, grid, left_on='time', right_on='grille',
+                       direction='nearest', tolerance=tolerance)
+
+    grouped = df.groupby(['grille', 'face_f'], observed=True)[POROMETRE]
+    mean = grouped.mean().rename_axis(index=['time', 'serie'], columns='variable')
+    count = grouped.count().rename_axis(index=['time', 'serie'], columns='variable')
+
+    long = pd.DataFrame({'valeur': mean.stack(), 'n': count.stack()})
+    long = long[long['n'] > 0].reset_index()
+    long['serie'] = long['serie'].astype(str)
+    long['instrument'] = 'porometre'
+
+    return long
+
+'''
+    Toutes les mesures de la campagne `year` sur la grille `base` (voir
+    l'en-tête) ; `tolerance` vaut base/2 par défaut.
+'''
+def align_campaign(year, base=BASE, tolerance=None):
+    parts = [_regular(year, instrument, base)
+             for instrument in SERIES if year in SCHEMAS[instrument]]
+
+    if year in SCHEMAS['porometre']:
+        parts.append(_porometre(year, base, tolerance))
+
+    if not parts:
+        return pd.DataFrame(columns=COLUMNS)
+
+    long = pd.concat(parts, ignore_index=True)
+    long['annee'] = year
+
+    return long[COLUMNS]
+
+'''
+    Aligne toutes les campagnes demandées (par défaut, toutes celles de
+    loaders.SCHEMAS), chacune dans un processus séparé.
+'''
+def align(years=None, base=BASE, tolerance=None, workers=None):
+    years = [year for year in campaigns() if years is None or year in years]
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        parts = list(pool.map(align_campaign, years,
+                              [base] * len(years), [tolerance] * len(years)))
+
+    long = pd.concat(parts, ignore_index=True)
+
+    for col in ['instrument', 'variable', 'serie']:
+        long[col] = long[col].astype('category')
+
+    return long
+
+'''
+    Une ligne par (année, date), une colonne par variable : moyenne sur les
+    séries (plantes, encodeurs, faces). Les dates où seule une partie des
+    instruments a mesuré ont des NaN dans les autres colonnes.
+'''
+def wide(long):
+    return long.pivot_table(index=['annee', 'time'], columns='variable',
+                            values='valeur', aggfunc='mean', observed=True)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Alignement des instruments sur une base de temps commune.")
+    parser.add_argument('--years', nargs='+', type=int, default=None)
+    parser.add_argument('--base', default=BASE, help="pas de la grille commune (e.g., 1h, 30min)")
+    parser.add_argument('--tolerance', default=None,
+                        help="écart maximal entre une mesure du poromètre et la grille (base/2 par défaut)")
+    parser.add_argument('--out', default=None, help="fichier CSV où écrire le tableau")
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    long = align(args.years, args.base, args.tolerance, args.workers)
+
+    if args.out is None:
+        print(long)
+        print(wide(long).dropna())
+    else:
+        long.to_csv(args.out, sep=';', index=False)
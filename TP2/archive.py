@@ -0,0 +1,105 @@
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from loaders import DATA_DIR, SCHEMAS
+from utils import positions
+
+'''
+    Archive sur disque des séries traitées, lisible par numpy.memmap.
+
+    Chaque série (un DataFrame indexé par le temps) est enregistrée dans un
+    dossier data/archive/<nom>/ :
+        - time.npy : les dates, en entiers 64 bits (datetime64) ;
+        - <i>.npy  : une colonne par fichier, à pas fixe (float32, float64, ...) ;
+        - meta.json : noms et types des colonnes, nombre de lignes, ...
+
+    read_archive() ouvre ces fichiers avec np.load(mmap_mode='r') : une
+    requête sur un intervalle de dates (e.g., une journée, ou l'intervalle
+    d'une feuille de pipelines.FEUILLES) fait une recherche dichotomique dans
+    les dates (voir utils.positions) puis découpe les colonnes sans les
+    copier. Seules les pages correspondant à l'intervalle sont lues sur le
+    disque, quel que soit le nombre de campagnes archivées.
+
+    Utilisation : python archive.py [année ...]
+    (archive les séries filtrées de toutes les campagnes)
+'''
+
+ARCHIVE_DIR = os.path.join(DATA_DIR, 'archive')
+
+def archive_path(name):
+    return os.path.join(ARCHIVE_DIR, name)
+
+def write_archive(df, name):
+    path = archive_path(name)
+    os.makedirs(path, exist_ok=True)
+
+    np.save(os.path.join(path, 'time.npy'), df.index.to_numpy())
+
+    for i, col in enumerate(df.columns):
+        np.save(os.path.join(path, '{i}.npy'.format(i=i)), np.ascontiguousarray(df[col].to_numpy()))
+
+    meta = {'columns': [str(col) for col in df.columns],
+            'dtypes': [str(dtype) for dtype in df.dtypes],
+            'index_name': df.index.name,
+            'rows': len(df)}
+
+    # meta.json est écrit en dernier : une archive sans meta.json est incomplète
+    with open(os.path.join(path, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=1)
+
+    return path
+
+def read_meta(name):
+    with open(os.path.join(archive_path(name), 'meta.json'), encoding='utf-8') as f:
+        return json.load(f)
+
+'''
+    Lit l'archive `name` entre les dates `start` et `end` (incluses, None =
+    depuis le début / jusqu'à la fin), éventuellement limitée à `columns`.
+
+    Les colonnes du DataFrame renvoyé sont des vues (en lecture seule) sur
+    les fichiers projetés en mémoire : aucune donnée n'est copiée.
+'''
+def read_archive(name, start=None, end=None, columns=None):
+    path = archive_path(name)
+    meta = read_meta(name)
+
+    time = np.load(os.path.join(path, 'time.npy'), mmap_mode='r')
+    i, j = positions(time, start, end)
+
+    columns = meta['columns'] if columns is None else list(columns)
+
+    data = {col: np.load(os.path.join(path, '{i}.npy'.format(i=meta['columns'].index(col))),
+                         mmap_mode='r')[i:j]
+            for col in columns}
+
+    index = pd.DatetimeIndex(time[i:j], name=meta['index_name'])
+
+    return pd.DataFrame(data, index=index, copy=False)
+
+'''
+    Séries archivées pour chaque campagne : les données filtrées sur une
+    grille régulière (voir pipelines.compute_growth et compute_transpiration).
+'''
+def archive_campaigns(years=None):
+    from pipelines import compute_growth, compute_transpiration
+
+    series = {'croissance': (compute_growth, 'filtrees'),
+              'balances': (compute_transpiration, 'filtree')}
+
+    paths = []
+    for instrument, (compute, key) in series.items():
+        for year in sorted(SCHEMAS[instrument]):
+            if years is None or year in years:
+                df = compute(year)[key]
+                paths.append(write_archive(df, '{i}-{y}'.format(i=instrument, y=year)))
+
+    return paths
+
+if __name__ == '__main__':
+    for path in archive_campaigns([int(year) for year in sys.argv[1:]] or None):
+        print(path)
@@ -0,0 +1,104 @@
+import argparse
+import os
+
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from loaders import SCHEMAS
+from pipelines import compute_growth, compute_porometre, compute_transpiration
+
+'''
+    Exécution des analyses de plusieurs campagnes en une seule fois.
+
+    Chaque couple (année, instrument) est calculé dans un processus séparé.
+    Les résultats sont rassemblés dans quelques tableaux "longs" (une ligne
+    par observation, avec les colonnes 'annee' et 'instrument'), ce qui
+    permet de comparer directement les années entre elles :
+        - 'totaux'      : total journalier de chaque plante / encodeur ;
+        - 'profils'     : profil journalier moyen normalisé ;
+        - 'feuilles'    : croissance de chaque feuille suivie (voir
+                          pipelines.leaf_segments) ;
+        - 'regressions' : régression conductance stomatique vs. PAR, avec
+                          intervalles de confiance bootstrap ;
+        - 'comparaisons': conductance stomatique par groupe (face, rang,
+                          heure, état) et p-valeurs des tests de permutation.
+
+    Utilisation : python batch.py --years 2023 2026 --instruments balances croissance --out resultats
+'''
+
+COMPUTE = {
+    'balances': compute_transpiration,
+    'croissance': compute_growth,
+    'porometre': compute_porometre,
+    }
+
+def _tidy_totals(totals):
+    long = totals.rename_axis(index='jour', columns='serie').stack().rename('valeur')
+
+    return long.reset_index()
+
+def _tidy_profiles(profiles):
+    return profiles.rename_axis(index=['serie', 'creneau']).reset_index()
+
+'''
+    Calcule une campagne et renvoie ses résultats sous forme de tableaux longs.
+'''
+def run_one(year, instrument):
+    r = COMPUTE[instrument](year)
+
+    if instrument == 'porometre':
+        tables = {'regressions': r['regression'].to_frame().T,
+                  'comparaisons': r['comparaisons']}
+    else:
+        tables = {'totaux': _tidy_totals(r['totaux']),
+                  'profils': _tidy_profiles(r['profils'])}
+
+    if instrument == 'croissance':
+        tables['feuilles'] = r['feuilles']
+
+    for table in tables.values():
+        table.insert(0, 'instrument', instrument)
+        table.insert(0, 'annee', year)
+
+    return tables
+
+'''
+    Calcule toutes les campagnes demandées (par défaut, toutes celles décrites
+    dans loaders.SCHEMAS) en parallèle et concatène les résultats.
+'''
+def run(years=None, instruments=None, workers=None):
+    instruments = instruments or list(COMPUTE)
+
+    jobs = [(year, instrument)
+            for instrument in instruments
+            for year in sorted(SCHEMAS[instrument])
+            if years is None or year in years]
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(run_one, *zip(*jobs)))
+
+    tables = {}
+    for result in results:
+        for name, table in result.items():
+            tables.setdefault(name, []).append(table)
+
+    return {name: pd.concat(parts, ignore_index=True) for name, parts in tables.items()}
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Analyse de plusieurs campagnes de mesures.")
+    parser.add_argument('--years', nargs='+', type=int, default=None)
+    parser.add_argument('--instruments', nargs='+', choices=list(COMPUTE), default=None)
+    parser.add_argument('--out', default=None, help="dossier où écrire les tableaux (CSV)")
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    tables = run(args.years, args.instruments, args.workers)
+
+    for name, table in tables.items():
+        if args.out is None:
+            print(name.upper())
+            print(table)
+        else:
+            os.makedirs(args.out, exist_ok=True)
+            table.to_csv(os.path.join(args.out, name + '.csv'), sep=';', index=False)
@@ -0,0 +1,439 @@
+import subprocess
+import sys
+
+from time import perf_counter
+
+import numpy as np
+import pandas as pd
+
+from scipy.ndimage import median_filter
+
+from loaders import load_balances, load_croissance, load_porometre, to_compact
+import memo
+import utils
+
+from utils import daily_reset, daily_normalize, daily_profile, daily_transform, DayIndex, plot_cols
+from regularize import regularize
+from smoothing import rolling_median
+from rate import local_slope, savgol_rate, smoothed_rate
+from pipelines import compute_growth, compute_transpiration
+from resampling import compare_groups
+
+'''
+    Mesures de performance des fonctions de utils.py.
+
+    Utilisation : python benchmarks.py [nom ...]
+    Sans argument, toutes les mesures sont lancées.
+'''
+
+'''
+    Renvoie le meilleur temps (en secondes) sur `repeat` exécutions de f().
+'''
+def timeit(f, repeat=3):
+    best = float('inf')
+
+    for _ in range(repeat):
+        t = perf_counter()
+        f()
+        best = min(best, perf_counter() - t)
+
+    return best
+
+def report(name, t_ref, t_new):
+    print("{n:<50} référence {r:8.4f} s | nouveau {v:8.4f} s | x{x:.1f}".format(n=name,
+                                                                           r=t_ref,
+                                                                           v=t_new,
+                                                                           x=t_ref/t_new))
+
+'''
+    Jeux de données : les fichiers de croissance et de balances fournis,
+    et une série synthétique d'un an à la minute (5 colonnes).
+'''
+def shipped_datasets():
+    df = pd.read_csv('data/croissance-2026.csv', sep=';')
+    df['time'] = pd.to_datetime(df['time'], format='%d-%m-%Y %H:%M:%S')
+    df = df.set_index('time').drop(columns=['enc_5'])
+
+    data = pd.read_csv('data/balances-2024.csv', sep=';')
+    data['time'] = pd.to_datetime(data['time'], format='%d-%m-%y %H:%M')
+    data = data.set_index('time')
+
+    return {'croissance-2026': abs(df).astype(float),
+            'balances-2024': -data}
+
+def synthetic_year(columns=5, seed=0):
+    rng = np.random.default_rng(seed)
+
+    index = pd.date_range('2025-01-01', '2025-12-31 23:59', freq='min')
+    values = np.cumsum(rng.random((len(index), columns)), axis=0)
+
+    return pd.DataFrame(values, index=index,
+                        columns=['enc_{i}'.format(i=i) for i in range(1, columns+1)])
+
+'''
+    Implémentations de référence (boucle sur les jours), conservées pour
+    vérifier l'équivalence des résultats et mesurer le gain.
+'''
+def daily_reset_loop(col):
+    df = pd.Series(index=col.index)
+
+    for day in np.unique(col.index.date):
+        idx = day.strftime('%Y-%m-%d')
+        df.loc[idx] = col[idx] - min(col[idx])
+
+    return df
+
+def daily_normalize_loop(col):
+    df = pd.Series(index=col.index)
+
+    for day in np.unique(col.index.date):
+        idx = day.strftime('%Y-%m-%d')
+        df.loc[idx] = col[idx]/max(col[idx]) * 100
+
+    return df
+
+'''
+    Une journée constante (e.g., encodeurs enc_1 et enc_3 le 2026-02-16),
+    mesurée à des secondes irrégulières puis mise sur la grille
+    (regularize.regularize), doit rester constante : sa série normalisée
+    vaut NaN (0 / 0) et non du bruit d'arrondi étiré entre 0 et 100 %.
+'''
+def check_constant_day():
+    time = pd.date_range('2026-02-16', periods=1500, freq='1min', name='time')
+    time += pd.to_timedelta(np.random.default_rng(0).integers(0, 59, len(time)), unit='s')
+    df = pd.DataFrame({'enc_1': np.full(len(time), 0.1 * 3),
+                       'enc_3': np.full(len(time), 7.31)}, index=time.sort_values())
+
+    for data in [df, to_compact(df)]:
+        norm = daily_normalize(daily_reset(regularize(data)[0]))
+        assert norm.isna().all().all()
+
+def bench_daily():
+    check_constant_day()
+
+    datasets = shipped_datasets()
+    datasets['synthétique (1 an, 1 min)'] = synthetic_year()
+
+    for name, df in datasets.items():
+        ref = df.apply(daily_reset_loop)
+        new = daily_reset(df)
+        pd.testing.assert_frame_equal(ref, new, check_freq=False)
+
+        report("daily_reset - " + name,
+               timeit(lambda: df.apply(daily_reset_loop), repeat=1),
+               timeit(lambda: daily_reset(df)))
+
+        ref = new.apply(daily_normalize_loop)
+        pd.testing.assert_frame_equal(ref, daily_normalize(new), check_freq=False)
+
+        report("daily_normalize - " + name,
+               timeit(lambda: new.apply(daily_normalize_loop), repeat=1),
+               timeit(lambda: daily_normalize(new)))
+
+'''
+    Filtre médian glissant : df.apply(median_filter) (scipy) contre
+    smoothing.rolling_median, avec la même fenêtre en nombre d'échantillons.
+    On affiche aussi l'écart maximal entre les deux résultats : il est nul
+    sans NaN ; avec des NaN, scipy renvoie NaN (ou n'importe quoi) dans les
+    fenêtres concernées, alors que rolling_median les ignore.
+'''
+def bench_median():
+    datasets = shipped_datasets()
+    datasets['synthétique (1 an, 1 min)'] = synthetic_year()
+
+    with_gaps = synthetic_year()
+    with_gaps.iloc[::1000] = np.nan
+    datasets['synthétique avec NaN'] = with_gaps
+
+    for name, df in datasets.items():
+        size = 51 if len(df) > 10000 else 21
+
+        ref = df.apply(median_filter, size=size)
+        new = rolling_median(df, size)
+
+        report("médiane glissante - " + name,
+               timeit(lambda: df.apply(median_filter, size=size)),
+               timeit(lambda: rolling_median(df, size)))
+        print("    écart max : {e:.3g}".format(e=(ref - new).abs().max().max()))
+
+'''
+    Temps de démarrage : chaque module est importé dans un nouvel interpréteur
+    avec `python -X importtime`. On affiche le temps d'import cumulé du module,
+    les paquets les plus lents qu'il charge, et on vérifie que les modules de
+    calcul ne chargent ni matplotlib, ni scipy (importés à la demande).
+'''
+STARTUP_MODULES = ['utils', 'loaders', 'pipelines', 'batch', 'incremental', 'croissance_full']
+
+LAZY_PACKAGES = ['matplotlib', 'scipy', 'seaborn']
+
+def import_times(module):
+    out = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import ' + module],
+                         capture_output=True, text=True, check=True).stderr
+
+    # Lignes "import time:      self [us] | cumulative | imported package"
+    times = {}
+    for line in out.splitlines()[1:]:
+        if not line.startswith('import time:'):
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative) / 1e6
+
+    return times
+
+def bench_startup(modules=STARTUP_MODULES, top=5):
+    for module in modules:
+        times = import_times(module)
+
+        packages = {name: t for name, t in times.items() if '.' not in name and name != module}
+        heaviest = sorted(packages.items(), key=lambda item: -item[1])[:top]
+
+        print("{n:<50} import {t:8.4f} s".format(n="démarrage - " + module, t=times[module]))
+        print("    modules les plus lents : " + ", ".join("{p} {t:.3f} s".format(p=p, t=t) for p, t in heaviest))
+
+        loaded = [p for p in LAZY_PACKAGES if p in times]
+        if loaded and not module.endswith('_full'):
+            print("    ATTENTION, chargés au démarrage : " + ", ".join(loaded))
+
+'''
+    Représentation compacte (int32/float32, voir loaders.to_compact) contre
+    float64/int64 : mémoire des données et des résultats de la chaîne
+    regularize, rolling_median, daily_reset, daily_normalize et daily_profile,
+    temps de calcul, et écart maximal entre les résultats des deux
+    représentations.
+'''
+def daily_chain(df):
+    df = rolling_median(regularize(df)[0], 21)
+
+    daily = daily_reset(df)
+    norm = daily_normalize(daily)
+    profile = pd.concat({col: daily_profile(norm[col]) for col in norm.columns})
+
+    return daily, norm, profile
+
+def memory(*frames):
+    return sum(frame.memory_usage(deep=True).sum() for frame in frames) / 2**20
+
+def bench_compact():
+    datasets = {'croissance-2026 (pas des encodeurs)': load_croissance(2026).drop(columns=['enc_5']),
+                'balances-2024': -load_balances(2024),
+                'synthétique (1 an, 1 min)': synthetic_year()}
+
+    for name, df in datasets.items():
+        small = to_compact(df)
+
+        ref = daily_chain(df)
+        new = daily_chain(small)
+
+        report("représentation compacte - " + name,
+               timeit(lambda: daily_chain(df)),
+               timeit(lambda: daily_chain(small)))
+
+        print("    mémoire : {r:.1f} Mo -> {n:.1f} Mo | types : {t}".format(r=memory(df, *ref),
+                                                                        n=memory(small, *new),
+                                                                        t=sorted({str(t) for t in new[1].dtypes})))
+        print("    écart max : journalière {d:.3g} | normalisée {n:.3g} % | profil {p:.3g} %".format(
+            d=(ref[0] - new[0]).abs().max().max(),
+            n=(ref[1] - new[1]).abs().max().max(),
+            p=(ref[2] - new[2]).abs().max().max()))
+
+    bench_compact_pipelines()
+
+'''
+    Pipelines complets (voir pipelines.py) en float64 contre compact=True,
+    sans le cache de memo.py : temps de calcul, écart maximal et nombre de
+    NaN de chaque série.
+'''
+PIPELINES_COMPACT = {'croissance-2026': (compute_growth, 2026),
+                     'croissance-2025': (compute_growth, 2025),
+                     'balances-2025': (compute_transpiration, 2025)}
+
+SERIES_COMPACT = ['journaliere', 'journaliere_norm', 'profils', 'vitesse']
+
+def bench_compact_pipelines():
+    enabled, memo.ENABLED = memo.ENABLED, False
+
+    try:
+        for name, (compute, year) in PIPELINES_COMPACT.items():
+            ref = compute(year)
+            new = compute(year, compact=True)
+
+            report("pipeline compact - " + name,
+                   timeit(lambda: compute(year), repeat=1),
+                   timeit(lambda: compute(year, compact=True), repeat=1))
+
+            for key in SERIES_COMPACT:
+                print("    {k:<17} écart max {e:.3g} | NaN {r} -> {n}".format(
+                    k=key, e=(ref[key] - new[key]).abs().max().max(),
+                    r=ref[key].isna().sum().sum(), n=new[key].isna().sum().sum()))
+    finally:
+        memo.ENABLED = enabled
+
+'''
+    Découpage par journée et par intervalle sur une année à la minute :
+    étiquettes (chaînes de dates, comme les anciennes boucles de utils.py et
+    les intervalles des feuilles) contre positions précalculées (DayIndex).
+'''
+def bench_days():
+    df = synthetic_year()
+    s = df['enc_1']
+
+    def by_label():
+        return [s[day.strftime('%Y-%m-%d')].max() for day in np.unique(s.index.date)]
+
+    def by_position():
+        return [s.iloc[rows].max() for _, rows in DayIndex(s.index)]
+
+    assert by_label() == by_position()
+    report("max de chaque journée - synthétique (1 an, 1 min)",
+           timeit(by_label), timeit(by_position))
+
+    # Intervalles de 3 jours, comme ceux de pipelines.FEUILLES
+    starts = pd.date_range('2025-01-02', '2025-12-20', freq='5D').strftime('%Y-%m-%d')
+    ends = (pd.to_datetime(starts) + pd.Timedelta(days=3)).strftime('%Y-%m-%d')
+    days = DayIndex(df.index)
+
+    def intervals_by_label():
+        return [df[start:end] for start, end in zip(starts, ends)]
+
+    def intervals_by_position():
+        return [df.iloc[days.between(start, end)] for start, end in zip(starts, ends)]
+
+    for ref, new in zip(intervals_by_label(), intervals_by_position()):
+        pd.testing.assert_frame_equal(ref, new)
+    report("intervalles de 3 jours (index déjà construit)",
+           timeit(intervals_by_label), timeit(intervals_by_position))
+
+    for how in ['min', 'max']:
+        ref = df.groupby(df.index.normalize()).transform(how)
+        pd.testing.assert_frame_equal(ref, daily_transform(df, how), check_freq=False)
+        report("daily_transform('{h}') - groupby / tranches".format(h=how),
+               timeit(lambda: df.groupby(df.index.normalize()).transform(how)),
+               timeit(lambda: daily_transform(df, how)))
+
+'''
+    Vitesse de transpiration : np.gradient (pas constant) colonne par colonne
+    puis médiane glissante sur 11 échantillons, comme les anciens scripts,
+    contre rate.smoothed_rate (pipeline de transpiration, même résultat),
+    rate.savgol_rate (pipeline de croissance) et rate.local_slope
+    (régression linéaire locale sur les vraies dates, en une passe 2D).
+'''
+def bench_rate():
+    # Sur la grille régulière, comme dans les pipelines
+    datasets = {'balances-2024': regularize(shipped_datasets()['balances-2024'])[0],
+                'synthétique (1 an, 1 min)': synthetic_year()}
+
+    for name, df in datasets.items():
+        step = df.index[1] - df.index[0]
+
+        def old():
+            return rolling_median(df.apply(np.gradient, args=(step / pd.Timedelta(hours=1),)), 11)
+
+        pd.testing.assert_frame_equal(old(), smoothed_rate(df, 11), check_freq=False)
+
+        report("vitesse (smoothed_rate) - " + name,
+               timeit(old),
+               timeit(lambda: smoothed_rate(df, 11)))
+        report("vitesse (local_slope) - " + name,
+               timeit(old),
+               timeit(lambda: local_slope(df, 11)))
+        report("vitesse (savgol_rate) - " + name,
+               timeit(old),
+               timeit(lambda: savgol_rate(df, 11)))
+
+'''
+    Tracé d'une figure (plot_cols, backend Agg, rendu compris) avec toutes
+    les données contre la réduction min/max par pixel (utils.decimate).
+'''
+def bench_plot():
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    def draw(*args, **kwargs):
+        for num in plt.get_fignums():
+            plt.figure(num).canvas.draw()
+        plt.close('all')
+
+    show = plt.show
+    plt.show = draw
+
+    def plot(df, decimated):
+        utils.DECIMATE = decimated
+        plot_cols(df, title="", ylabel="")
+
+    datasets = shipped_datasets()
+    datasets['synthétique (1 an, 1 min)'] = synthetic_year()
+
+    try:
+        for name, df in datasets.items():
+            report("plot_cols - " + name,
+                   timeit(lambda: plot(df, False)),
+                   timeit(lambda: plot(df, True)))
+    finally:
+        utils.DECIMATE = True
+        plt.show = show
+
+'''
+    Variables qualitatives du poromètre en texte contre en 'category' (voir
+    loaders.categorize) : groupby(...).describe() par face, rang et état, sur
+    les mesures de 2025 répétées pour simuler de nombreuses campagnes.
+'''
+def bench_porometre(repeat=1000):
+    df = pd.concat([load_porometre(2025)] * repeat, ignore_index=True)
+    text = df.astype({col: str for col in ['face_f', 'rang_f', 'état_f', 'pos_f']})
+
+    def describe(data):
+        return [data.groupby(col, observed=True)['cond'].describe()
+                for col in ['face_f', 'rang_f', 'état_f', 'pos_f']]
+
+    for ref, new in zip(describe(text), describe(df)):
+        # Même résultat, mais dans l'ordre des modalités (e.g., rang '3-4' avant '11-12')
+        pd.testing.assert_frame_equal(ref, new.set_axis(new.index.astype(str)).loc[ref.index])
+
+    report("groupby poromètre - {n} mesures".format(n=len(df)),
+           timeit(lambda: describe(text)),
+           timeit(lambda: describe(df)))
+    print("    mémoire : {r:.1f} Mo -> {n:.1f} Mo".format(r=memory(text), n=memory(df)))
+
+'''
+    Intervalles de confiance bootstrap et test de permutation (face de la
+    feuille) : boucle Python sur les rééchantillonnages contre
+    resampling.compare_groups (tous les rééchantillonnages en une matrice).
+'''
+def bench_resampling(n_resamples=10000):
+    df = load_porometre(2026)[['face_f', 'cond']].dropna()
+    x = df['cond'].to_numpy(dtype=float)
+    abaxial = (df['face_f'] == df['face_f'].cat.categories[0]).to_numpy()
+
+    def loop():
+        rng = np.random.default_rng(0)
+        means = [[rng.choice(x[mask], size=mask.sum()).mean() for _ in range(n_resamples)]
+                 for mask in [abaxial, ~abaxial]]
+        observed = abs(x[abaxial].mean() - x[~abaxial].mean())
+        extreme = 0
+        for _ in range(n_resamples):
+            p = rng.permutation(abaxial)
+            extreme += abs(x[p].mean() - x[~p].mean()) >= observed
+        return means, (1 + extreme) / (1 + n_resamples)
+
+    report("bootstrap + permutation - {n} tirages".format(n=n_resamples),
+           timeit(loop, repeat=1),
+           timeit(lambda: compare_groups(df, 'face_f', 'cond', n_resamples=n_resamples)))
+
+BENCHMARKS = {
+    'daily': bench_daily,
+    'median': bench_median,
+    'startup': bench_startup,
+    'compact': bench_compact,
+    'days': bench_days,
+    'rate': bench_rate,
+    'plot': bench_plot,
+    'porometre': bench_porometre,
+    'resampling': bench_resampling,
+    }
+
+if __name__ == '__main__':
+    names = sys.argv[1:] or list(BENCHMARKS)
+
+    for name in names:
+        BENCHMARKS[name]()
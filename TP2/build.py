@@ -0,0 +1,86 @@
+import os
+import sys
+
+from concurrent.futures import ProcessPoolExecutor
+
+import nbformat
+
+from nbconvert import NotebookExporter, WebPDFExporter
+from nbconvert.preprocessors import ExecutePreprocessor
+from traitlets.config import Config
+
+'''
+    Génération des énoncés et de la correction à partir de TP2.ipynb.
+
+    Le notebook est exécuté une seule fois, en mémoire. Chaque version (A à D)
+    est ensuite obtenue en retirant les cellules marquées par certains tags
+    (TagRemovePreprocessor), puis exportée en PDF et en notebook. Les 9
+    fichiers sont produits en parallèle.
+
+    Utilisation : python build.py [TP2.ipynb]
+'''
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+VERSIONS = ['A', 'B', 'C', 'D']
+
+'''
+    Liste des fichiers à produire : (format, tags des cellules à retirer,
+    fichier de sortie sans extension).
+'''
+def targets():
+    jobs = []
+
+    for version in VERSIONS:
+        # On retire la correction et les cellules des autres versions
+        tags = {'correction', 'hidden'} | set(VERSIONS) - {version}
+
+        jobs.append(('webpdf', tags, os.path.join('PDF', 'TP2_consignes_' + version)))
+        jobs.append(('notebook', tags, 'TP2-' + version))
+
+    # Notebook complet, avec correction et résultats
+    jobs.append(('webpdf', {'student-only'}, os.path.join('PDF', 'TP2_corrections')))
+
+    return jobs
+
+def execute(path):
+    nb = nbformat.read(path, as_version=4)
+
+    ExecutePreprocessor(timeout=600).preprocess(nb, {'metadata': {'path': os.path.dirname(path)}})
+
+    return nb
+
+def export(nb, fmt, tags, output):
+    c = Config()
+    c.TagRemovePreprocessor.enabled = True
+    c.TagRemovePreprocessor.remove_cell_tags = set(tags)
+
+    if fmt == 'webpdf':
+        exporter = WebPDFExporter(config=c)
+    else:
+        # Les notebooks distribués aux étudiants sont sans résultats
+        c.ClearOutputPreprocessor.enabled = True
+        exporter = NotebookExporter(config=c)
+
+    body, resources = exporter.from_notebook_node(nb)
+
+    path = os.path.join(HERE, output + resources['output_extension'])
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    mode = 'wb' if isinstance(body, bytes) else 'w'
+    with open(path, mode) as f:
+        f.write(body)
+
+    return path
+
+def build(path=os.path.join(HERE, 'TP2.ipynb'), workers=None):
+    nb = execute(path)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(export, nb, fmt, tags, output) for fmt, tags, output in targets()]
+
+        return [future.result() for future in futures]
+
+if __name__ == '__main__':
+    for path in build(*sys.argv[1:2]):
+        print(path)
@@ -0,0 +1,117 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+'''
+    Cache binaire des fichiers CSV déjà lus et convertis.
+
+    Le DataFrame produit par une fonction de lecture est enregistré colonne
+    par colonne dans un fichier .npz placé à côté du CSV (e.g.,
+    data/croissance-2026.csv.npz). Lors des exécutions suivantes, le fichier
+    .npz est relu directement, sans repasser par pd.read_csv() ni par
+    pd.to_datetime().
+
+    Le cache est invalidé dès que la taille ou la date de modification du CSV
+    change, ou que la clé `key` (qui décrit la manière de lire le fichier)
+    est différente.
+'''
+
+def cache_path(path):
+    return path + '.npz'
+
+# A incrémenter à chaque changement du format des fichiers .npz
+FORMAT = 2
+
+def _signature(path, key):
+    stat = os.stat(path)
+
+    return np.array([str(FORMAT), str(stat.st_size), str(stat.st_mtime_ns), key])
+
+'''
+    Les colonnes de texte (str, object, category) sont enregistrées sous
+    forme de codes entiers et d'un tableau de modalités en unicode à largeur
+    fixe : le fichier ne contient aucun objet Python (pas de pickle) et se
+    relit avec allow_pickle=False. Le type de chaque colonne est enregistré
+    et restauré à la lecture : le cache renvoie les mêmes types que la
+    lecture du CSV.
+'''
+def _is_text(dtype):
+    return isinstance(dtype, pd.CategoricalDtype) or pd.api.types.is_string_dtype(dtype)
+
+def _save(df, path, signature):
+    arrays = {'__signature__': signature,
+              '__columns__': np.array([str(col) for col in df.columns]),
+              '__dtypes__': np.array([str(dtype) for dtype in df.dtypes]),
+              '__index__': df.index.to_numpy(),
+              '__index_name__': np.array([] if df.index.name is None else [str(df.index.name)])}
+
+    for i, (col, dtype) in enumerate(df.dtypes.items()):
+        name = 'col_{i}'.format(i=i)
+
+        if _is_text(dtype):
+            values = df[col].astype('category').cat
+            arrays[name] = values.codes.to_numpy()
+            arrays[name + '_categories'] = np.array([str(c) for c in values.categories], dtype=str)
+        else:
+            arrays[name] = df[col].to_numpy()
+
+    # Ecriture dans un fichier temporaire puis renommage, pour ne jamais
+    # laisser un cache à moitié écrit si le programme est interrompu. Le nom
+    # du fichier temporaire dépend du processus (comme dans memo.py) : deux
+    # processus qui écrivent le même cache ne se marchent pas dessus.
+    tmp = '{p}.{pid}.tmp.npz'.format(p=path, pid=os.getpid())
+    np.savez(tmp, **arrays)
+    os.replace(tmp, path)
+
+def _column(f, i, dtype):
+    name = 'col_{i}'.format(i=i)
+
+    if name + '_categories' not in f.files:
+        return f[name]
+
+    values = pd.Categorical.from_codes(f[name], f[name + '_categories'].astype(object))
+
+    return values if dtype == 'category' else pd.Series(values).astype(dtype).to_numpy()
+
+def _load(path, signature):
+    with np.load(path, allow_pickle=False) as f:
+        if not np.array_equal(f['__signature__'], signature):
+            return None
+
+        index_name = f['__index_name__']
+        index = pd.Index(f['__index__'], name=index_name[0].item() if len(index_name) else None)
+
+        # Index par défaut (0, 1, 2, ...) : on retrouve le RangeIndex de la lecture
+        if index.dtype.kind == 'i' and np.array_equal(index, np.arange(len(index))):
+            index = pd.RangeIndex(len(index), name=index.name)
+
+        data = {col: _column(f, i, dtype)
+                for i, (col, dtype) in enumerate(zip(f['__columns__'].tolist(), f['__dtypes__'].tolist()))}
+
+        return pd.DataFrame(data, index=index)
+
+'''
+    Lit le fichier `path` avec la fonction parse(path), en passant par le cache
+    si celui-ci est à jour. `key` doit changer dès que parse() change de
+    comportement (format de date, colonnes, ...).
+'''
+def read_cached(path, parse, key=''):
+    signature = _signature(path, key)
+    cached = cache_path(path)
+
+    if os.path.exists(cached):
+        try:
+            df = _load(cached, signature)
+        except Exception:
+            # Cache illisible (version de numpy, fichier tronqué ou corrompu,
+            # ancien format, ...) : on relit le CSV et on réécrit le cache
+            df = None
+
+        if df is not None:
+            return df
+
+    df = parse(path)
+    _save(df, cached, signature)
+
+    return df
@@ -0,0 +1,118 @@
+import os
+
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from loaders import DATA_DIR, as_float, float_dtype
+
+'''
+    Corrections manuelles des données (sauts des balances lors des arrosages,
+    pince qui lâche, poulie qui patine, ...).
+
+    Les corrections sont décrites dans le fichier data/corrections.csv, une
+    ligne par correction :
+        - instrument, annee : campagne concernée ;
+        - etape : 'brut' (données telles que lues dans le fichier) ou
+          'converti' (après changement de signe / conversion en cm) ;
+        - colonne : colonne corrigée ;
+        - type :
+            'decalage' : ajoute (valeur - reference) à partir de `debut`
+                         (et jusqu'à `fin` si elle est donnée) ;
+            'fixe'     : remplace la donnée à `debut` (ou de `debut` à `fin`)
+                         par `valeur` ;
+            'copie'    : remplace les données de `debut` à `fin` par celles
+                         de la colonne `source` + `valeur` ;
+        - remarque : description libre.
+
+    Les 'copie' et 'fixe' sont appliquées en premier, dans l'ordre du fichier.
+    Tous les décalages d'une colonne sont ensuite cumulés en un seul vecteur
+    d'offsets, ajouté en une seule opération.
+'''
+
+CORRECTIONS_PATH = os.path.join(DATA_DIR, 'corrections.csv')
+
+@lru_cache
+def _read_table(path):
+    table = pd.read_csv(path, sep=';')
+
+    table['debut'] = pd.to_datetime(table['debut'], format='%Y-%m-%d %H:%M:%S')
+    table['fin'] = pd.to_datetime(table['fin'], format='%Y-%m-%d %H:%M:%S')
+    table['reference'] = table['reference'].fillna(0)
+
+    return table
+
+'''
+    Corrections de la campagne `year` de `instrument` pour l'étape `stage`.
+'''
+def corrections(instrument, year, stage, path=CORRECTIONS_PATH):
+    table = _read_table(path)
+
+    return table[(table['instrument'] == instrument)
+                 & (table['annee'] == year)
+                 & (table['etape'] == stage)]
+
+'''
+    Positions [start, stop[ des lignes de `index` comprises entre `debut` et
+    `fin` (bornes incluses, comme df.loc[debut:fin]). Sans `fin`, jusqu'à la
+    fin de l'index.
+'''
+def _positions(index, debut, fin):
+    start = index.searchsorted(debut, side='left')
+    stop = index.searchsorted(fin.fillna(debut), side='right')
+    stop = np.where(fin.isna(), len(index), stop)
+
+    return start, stop
+
+'''
+    Vecteur d'offsets cumulés correspondant aux décalages `rows` : chaque
+    décalage ajoute +v en début d'intervalle et -v en fin d'intervalle, et une
+    somme cumulée donne l'offset à appliquer à chaque ligne.
+'''
+def offset_vector(index, rows):
+    start, stop = _positions(index, rows['debut'], rows['fin'])
+    value = (rows['valeur'] - rows['reference']).to_numpy()
+
+    delta = np.zeros(len(index) + 1)
+    np.add.at(delta, start, value)
+    np.add.at(delta, stop, -value)
+
+    return np.cumsum(delta[:-1])
+
+'''
+    Applique à df les corrections de `table` (par défaut, celles de
+    `instrument`, `year` et `stage` dans data/corrections.csv).
+
+    Les corrections ne dépendent que des dates des lignes de df : elles
+    peuvent donc être appliquées à un morceau du fichier (voir streaming.py).
+'''
+def apply_corrections(df, instrument=None, year=None, stage=None, table=None):
+    if table is None:
+        table = corrections(instrument, year, stage)
+
+    if len(table) == 0:
+        return df
+
+    df = df.copy()
+    index = df.index
+
+    replaced = table[table['type'].isin(['copie', 'fixe'])]
+    start, stop = _positions(index, replaced['debut'], replaced['fin'].fillna(replaced['debut']))
+
+    for (_, row), i, j in zip(replaced.iterrows(), start, stop):
+        col = df.columns.get_loc(row['colonne'])
+
+        if row['type'] == 'copie':
+            source = df.columns.get_loc(row['source'])
+            df.iloc[i:j, col] = df.iloc[i:j, source] + row['valeur']
+        else:
+            df.iloc[i:j, col] = row['valeur']
+
+    offsets = table[table['type'] == 'decalage']
+    for col, rows in offsets.groupby('colonne'):
+        # Les données compactes (voir loaders.to_compact) restent en float32
+        values = as_float(df[col])
+        df[col] = values + offset_vector(index, rows).astype(float_dtype(values.dtype))
+
+    return df
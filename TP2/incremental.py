@@ -0,0 +1,293 @@
+import io
+import json
+import os
+import shutil
+import sys
+
+import numpy as np
+import pandas as pd
+
+from loaders import READ_OPTIONS, data_path, parse_rows, schema
+from pipelines import prepare_balances, prepare_croissance
+from streaming import DayBuffer, StreamingMedian
+from utils import daily_profile
+
+'''
+    Mode incrémental pour le suivi en direct d'une expérience.
+
+    Les data loggers ajoutent continuellement des lignes à la fin des fichiers
+    CSV. Plutôt que de tout recalculer à chaque fois, on garde entre deux
+    exécutions un état (IncrementalState) qui ne contient que ce qui peut
+    encore changer :
+        - la position (en octets) de la dernière ligne lue dans le CSV ;
+        - les dernières lignes en attente du filtre médian (voir streaming.py) ;
+        - les lignes filtrées de la journée en cours.
+
+    Dès qu'une journée est terminée, ses séries (filtrée, journalière et
+    normalisée, voir utils.daily_reset et utils.daily_normalize) sont écrites
+    une fois pour toutes dans un fichier de la réserve (un .npz par journée)
+    et ne sont plus relues lors des mises à jour : le coût d'une mise à jour
+    ne dépend que du nombre de nouvelles lignes, pas de la durée de la
+    campagne.
+
+    L'état est enregistré dans un dossier à côté du CSV (e.g.,
+    data/croissance-2026.csv.etat/) : state.json, tail.npz (lignes en
+    attente et journée en cours) et days/<date>.npz. Aucun objet Python
+    n'est enregistré (pas de pickle) : le script et les autres modules
+    partagent le même état.
+
+    Utilisation : python incremental.py croissance 2026
+'''
+
+PIPELINES = {
+    'croissance': {'prepare': prepare_croissance, 'window': 51},
+    'balances': {'prepare': prepare_balances, 'window': 21},
+    }
+
+# A incrémenter à chaque changement du format de l'état
+STATE_VERSION = 2
+
+# Séries enregistrées pour chaque journée terminée
+SERIES = ['filtree', 'journaliere', 'journaliere_norm']
+
+def state_dir(instrument, year):
+    return data_path(instrument, year) + '.etat'
+
+def _days_dir(path):
+    return os.path.join(path, 'days')
+
+'''
+    Séries journalières d'une seule journée de données filtrées.
+'''
+def _daily(rows):
+    daily = rows - rows.min()
+    daily_norm = daily / daily.max() * 100
+
+    return {'filtree': rows, 'journaliere': daily, 'journaliere_norm': daily_norm}
+
+def _save_npz(path, **arrays):
+    tmp = '{p}.{pid}.tmp.npz'.format(p=path, pid=os.getpid())
+    np.savez(tmp, **arrays)
+    os.replace(tmp, path)
+
+def _frame(time, values, columns):
+    return pd.DataFrame(values, index=pd.DatetimeIndex(time, name='time'), columns=columns)
+
+def _arrays(df, prefix):
+    if df is None:
+        return {}
+
+    return {prefix + '_time': df.index.to_numpy(), prefix + '_values': df.to_numpy(dtype=float)}
+
+class IncrementalState:
+    def __init__(self, instrument, year):
+        self.instrument = instrument
+        self.year = year
+        self.path = state_dir(instrument, year)
+
+        # Position dans le CSV et noms des colonnes (lus sur la 1re ligne)
+        self.offset = 0
+        self.header = None
+
+        # Colonnes des séries préparées (e.g., 'Plante 1', ...)
+        self.columns = None
+
+        self.median = StreamingMedian(PIPELINES[instrument]['window'])
+
+        # Lignes filtrées de la journée en cours (voir streaming.DayBuffer)
+        self.open_day = DayBuffer()
+
+    '''
+        Lit les lignes complètes ajoutées au CSV depuis la dernière mise à jour.
+    '''
+    def _read_new_rows(self, path):
+        with open(path, 'rb') as f:
+            f.seek(self.offset)
+            raw = f.read()
+
+        # Une ligne en cours d'écriture par le logger sera lue la prochaine fois
+        end = raw.rfind(b'\n') + 1
+        if end == 0:
+            return None
+
+        self.offset += end
+        buffer = io.BytesIO(raw[:end])
+
+        options = dict(READ_OPTIONS[self.instrument])
+        if self.header is None:
+            df = pd.read_csv(buffer, **options)
+            self.header = df.columns.tolist()
+        else:
+            df = pd.read_csv(buffer, header=None, names=self.header, **options)
+
+        if len(df) == 0:
+            return None
+
+        return parse_rows(df, self.instrument, schema(self.instrument, self.year))
+
+    '''
+        Ecrit les séries d'une journée terminée dans la réserve.
+    '''
+    def _write_day(self, day, rows):
+        os.makedirs(_days_dir(self.path), exist_ok=True)
+
+        series = _daily(rows)
+        _save_npz(os.path.join(_days_dir(self.path), '{d:%Y-%m-%d}.npz'.format(d=day)),
+                  time=rows.index.to_numpy(),
+                  **{name: df.to_numpy(dtype=float) for name, df in series.items()})
+
+    '''
+        Traite les lignes ajoutées au CSV. Renvoie le nombre de lignes filtrées
+        ajoutées aux séries dérivées.
+    '''
+    def update(self):
+        path = data_path(self.instrument, self.year)
+
+        # Le fichier a été remplacé par un fichier plus court : on recommence
+        if os.path.getsize(path) < self.offset:
+            self.__init__(self.instrument, self.year)
+            shutil.rmtree(_days_dir(self.path), ignore_errors=True)
+
+        df = self._read_new_rows(path)
+        if df is None:
+            return 0
+
+        prepared = PIPELINES[self.instrument]['prepare'](df, self.year)
+        self.columns = prepared.columns.tolist()
+
+        rows = self.median.push(prepared)
+        if len(rows) == 0:
+            return 0
+
+        for day, done in self.open_day.push(rows):
+            self._write_day(day, done)
+
+        return len(rows)
+
+    '''
+        Journées terminées de la réserve, dans l'ordre.
+    '''
+    def days(self):
+        folder = _days_dir(self.path)
+
+        if not os.path.isdir(folder):
+            return []
+
+        return sorted(os.path.join(folder, name) for name in os.listdir(folder) if name.endswith('.npz'))
+
+    '''
+        Série `name` (voir SERIES) sur toute la campagne : journées de la
+        réserve, puis journée en cours. Lit toute la réserve : à utiliser pour
+        afficher ou analyser les résultats, pas à chaque mise à jour.
+    '''
+    def series(self, name):
+        parts = []
+
+        for path in self.days():
+            with np.load(path, allow_pickle=False) as f:
+                parts.append(_frame(f['time'], f[name], self.columns))
+
+        rows = self.open_day.buffer
+        if rows is not None and len(rows) > 0:
+            parts.append(_daily(rows)[name])
+
+        return pd.concat(parts) if parts else None
+
+    @property
+    def filtered(self):
+        return self.series('filtree')
+
+    @property
+    def daily(self):
+        return self.series('journaliere')
+
+    @property
+    def daily_norm(self):
+        return self.series('journaliere_norm')
+
+    '''
+        Profil journalier moyen (voir utils.daily_profile) de la colonne `col`
+        de la série journalière normalisée.
+    '''
+    def profile(self, col, sampling_period, **kwargs):
+        return daily_profile(self.daily_norm[col], sampling_period, **kwargs)
+
+    def save(self):
+        os.makedirs(self.path, exist_ok=True)
+
+        median = self.median
+        meta = {'version': STATE_VERSION,
+                'offset': self.offset,
+                'header': self.header,
+                'columns': self.columns,
+                'last_emitted': None if median.last_emitted is None else median.last_emitted.isoformat()}
+
+        _save_npz(os.path.join(self.path, 'tail.npz'),
+                  **_arrays(median.buffer, 'median'), **_arrays(self.open_day.buffer, 'day'))
+
+        # state.json est écrit en dernier : il fait référence à tail.npz
+        tmp = os.path.join(self.path, 'state.json.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, indent=1)
+        os.replace(tmp, os.path.join(self.path, 'state.json'))
+
+    def _restore(self, meta, tail):
+        self.offset = meta['offset']
+        self.header = meta['header']
+        self.columns = meta['columns']
+
+        if meta['last_emitted'] is not None:
+            self.median.last_emitted = pd.Timestamp(meta['last_emitted'])
+
+        # Les lignes en attente du filtre sont les colonnes du CSV préparées,
+        # i.e. les mêmes que celles des séries filtrées
+        if 'median_time' in tail:
+            self.median.buffer = _frame(tail['median_time'], tail['median_values'], self.columns)
+        if 'day_time' in tail:
+            self.open_day.buffer = _frame(tail['day_time'], tail['day_values'], self.columns)
+
+def load_state(instrument, year):
+    state = IncrementalState(instrument, year)
+    path = os.path.join(state.path, 'state.json')
+
+    if not os.path.exists(path):
+        return state
+
+    with open(path, encoding='utf-8') as f:
+        meta = json.load(f)
+
+    if meta.get('version') != STATE_VERSION:
+        # Etat d'une ancienne version : on repart du début du fichier
+        shutil.rmtree(_days_dir(state.path), ignore_errors=True)
+        return state
+
+    with np.load(os.path.join(state.path, 'tail.npz'), allow_pickle=False) as tail:
+        state._restore(meta, {key: tail[key] for key in tail.files})
+
+    return state
+
+def save_state(state):
+    state.save()
+
+'''
+    Charge l'état précédent (s'il existe), traite les nouvelles lignes et
+    sauvegarde le nouvel état.
+'''
+def update(instrument, year):
+    state = load_state(instrument, year)
+    n = state.update()
+    save_state(state)
+
+    return state, n
+
+if __name__ == '__main__':
+    instrument, year = sys.argv[1], int(sys.argv[2])
+
+    state, n = update(instrument, year)
+
+    print("{n} nouvelles lignes traitées".format(n=n))
+
+    daily = state.daily
+    if daily is not None:
+        print("Dernière donnée filtrée : {t}".format(t=daily.index[-1]))
+        print(daily.tail())
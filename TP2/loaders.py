@@ -0,0 +1,288 @@
+import os
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+from cache import read_cached
+
+'''
+    Lecture des fichiers de données des différentes campagnes de mesures.
+
+    Le format des fichiers (et en particulier celui des dates) a changé d'une
+    année à l'autre. Plutôt que de multiplier les "if YEAR == ...", chaque
+    campagne est décrite par une entrée de SCHEMAS. Ajouter une nouvelle année
+    revient donc à ajouter une entrée dans ce dictionnaire.
+
+    Les dates sont toujours converties avec un format explicite (ou comme un
+    nombre de jours depuis une origine), jamais par inférence, ce qui reste
+    rapide et linéaire quelle que soit la taille du fichier.
+'''
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+# Fuseau horaire dans lequel toutes les dates sont exprimées (sans information
+# de fuseau) après conversion
+TIMEZONE = 'Europe/Brussels'
+
+# A incrémenter à chaque changement de _parse(), pour invalider le cache
+PARSER_VERSION = 2
+
+'''
+    Options de pd.read_csv() propres à chaque instrument.
+'''
+READ_OPTIONS = {
+    'balances': {'sep': ';'},
+    'croissance': {'sep': ';'},
+    # About encoding='latin-1' : https://stackoverflow.com/questions/5552555/unicodedecodeerror-invalid-continuation-byte#31492722
+    'porometre': {'sep': ';', 'encoding': 'latin-1'},
+    }
+
+'''
+    Description des dates de chaque campagne :
+        - 'columns' : colonne(s) contenant la date, concaténées avec un espace ;
+        - 'format'  : format explicite passé à pd.to_datetime() ;
+        - 'unit', 'origin' : date numérique (e.g., jours Excel depuis le 30/12/1899) ;
+        - 'tz'      : fuseau des dates du fichier, si ce n'est pas TIMEZONE.
+'''
+SCHEMAS = {
+    'balances': {
+        2023: {'columns': ['time'], 'format': '%d-%m-%y %H:%M'},
+        2024: {'columns': ['time'], 'format': '%d-%m-%y %H:%M'},
+        2025: {'columns': ['time'], 'unit': 'D', 'origin': '1899-12-30'},
+        2026: {'columns': ['time'], 'format': '%d-%m-%y %H:%M'},
+        },
+    'croissance': {
+        2023: {'columns': ['time'], 'format': '%d-%m-%y %H:%M'},
+        2025: {'columns': ['time'], 'format': '%Y-%m-%d %H:%M:%S UTC', 'tz': 'UTC'},
+        2026: {'columns': ['time'], 'format': '%d-%m-%Y %H:%M:%S'},
+        },
+    'porometre': {
+        2025: {'columns': ['date', 'heure'], 'format': '%d-%m-%y %H:%M'},
+        2026: {'columns': ['date', 'heure'], 'format': '%d/%m/%Y %H:%M'},
+        },
+    }
+
+def schema(instrument, year):
+    try:
+        return SCHEMAS[instrument][year]
+    except KeyError:
+        raise ValueError("Pas de données '{i}' pour l'année {y}.".format(i=instrument, y=year)) from None
+
+def data_path(instrument, year):
+    return os.path.join(DATA_DIR, '{i}-{y}.csv'.format(i=instrument, y=year))
+
+'''
+    Convertit la ou les colonnes de date de df en dates (sans fuseau horaire,
+    exprimées dans TIMEZONE) selon le schéma s.
+'''
+def parse_time(df, s):
+    cols = s['columns']
+
+    raw = df[cols[0]]
+    for col in cols[1:]:
+        raw = raw + ' ' + df[col]
+
+    if 'unit' in s:
+        time = pd.to_datetime(raw, unit=s['unit'], origin=s['origin'])
+    else:
+        time = pd.to_datetime(raw, format=s['format'])
+
+    if 'tz' in s:
+        time = time.dt.tz_localize(s['tz']).dt.tz_convert(TIMEZONE).dt.tz_localize(None)
+
+    return time
+
+'''
+    Nom de colonne (ou texte) écrit en UTF-8 mais décodé en latin-1 (e.g.,
+    'Ã©tat_f' au lieu de 'état_f') : on le redécode. Les autres sont
+    seulement nettoyés des espaces.
+'''
+def fix_text(text):
+    try:
+        text = text.encode('latin-1').decode('utf-8')
+    except (UnicodeEncodeError, UnicodeDecodeError):
+        pass
+
+    return unicodedata.normalize('NFC', text.strip())
+
+'''
+    Met en forme des lignes brutes lues dans le fichier de `instrument`
+    (fichier complet, ou morceau lu par streaming.py et incremental.py) selon
+    le schéma s : noms de colonnes corrigés, lignes vides retirées et
+    colonnes de date remplacées par la date.
+'''
+def parse_rows(df, instrument, s):
+    df.columns = [fix_text(col) for col in df.columns]
+
+    # Lignes vides (e.g., ';;;' à la fin du fichier du poromètre 2026)
+    df = df.dropna(how='all')
+
+    time = parse_time(df, s)
+    df = df.drop(columns=s['columns'])
+
+    # Les relevés du poromètre sont des points isolés : on garde la date
+    # comme une colonne. Les autres instruments sont des séries temporelles.
+    if instrument == 'porometre':
+        df['time'] = time
+        return df
+
+    return df.set_index(time.rename('time'))
+
+'''
+    Colonnes à lire dans le fichier `path` : les colonnes sans nom (e.g., les
+    ';;;' vides à la fin des lignes du poromètre) ne sont pas lues.
+'''
+def named_columns(path, options):
+    header = pd.read_csv(path, nrows=0, **options).columns
+
+    return [col for col in header if not col.startswith('Unnamed:')]
+
+def _parse(instrument, year):
+    s = schema(instrument, year)
+
+    def parse(path):
+        options = READ_OPTIONS[instrument]
+
+        df = pd.read_csv(path, usecols=named_columns(path, options), **options)
+
+        return parse_rows(df, instrument, s)
+
+    return parse
+
+'''
+    Modalités des variables qualitatives du poromètre, dans l'ordre dans
+    lequel elles sont comparées et affichées. Le rang de la feuille ('5-6' en
+    2025, 5 en 2026) est ordonné selon son premier nombre.
+'''
+CATEGORIES = {
+    'face_f': ['Abaxiale', 'Adaxiale'],
+    'pos_f': ['Base', 'Milieu', 'Pointe'],
+    'état_f': ['Jeune', 'Bien développée', 'Vieille'],
+    'rang_f': None,
+    'remarque': None,
+    }
+
+def _rank(value):
+    return float(value.split('-')[0])
+
+'''
+    Convertit les variables qualitatives du poromètre en pandas 'category'
+    (ordonnées selon CATEGORIES) : les groupby et les graphes par face, rang
+    ou état travaillent alors sur des codes entiers. Les textes sont nettoyés
+    (espaces, encodage, majuscule initiale) sur les seules modalités, pas sur
+    chaque ligne.
+'''
+def categorize(df):
+    df = df.copy()
+
+    for col, order in CATEGORIES.items():
+        if col not in df.columns:
+            continue
+
+        values = df[col]
+        if pd.api.types.is_float_dtype(values.dtype):
+            # Rang noté comme un nombre (5.0 -> '5')
+            values = values.map(lambda v: None if pd.isna(v) else '{v:g}'.format(v=v))
+
+        values = values.astype('category')
+
+        # Nettoyage des modalités ('bien développée' et 'Bien développée'
+        # deviennent la même modalité)
+        clean = {}
+        for c in values.cat.categories:
+            text = fix_text(str(c))
+            clean[c] = text if col == 'remarque' else text[:1].upper() + text[1:]
+
+        values = values.map(clean).astype('category')
+
+        extra = sorted(set(values.cat.categories) - set(order or []),
+                       key=_rank if col == 'rang_f' else None)
+        df[col] = values.cat.set_categories(list(order or []) + extra, ordered=col != 'remarque')
+
+    return df
+
+'''
+    Représentation compacte d'une série de mesures : les colonnes entières
+    (e.g., pas des encodeurs) sont stockées en int32 et les colonnes réelles
+    (e.g., poids des balances) en float32, dans des tableaux contigus. L'index
+    reste un DatetimeIndex (entiers 64 bits). La mémoire est environ divisée
+    par deux ; regularize, smoothing.rolling_median, pipelines.elongation et
+    les fonctions de utils.py conservent ces types (voir float_dtype).
+    Le gain porte sur la mémoire : le temps de calcul est à peu près le même
+    (x0.9 à x1.1 selon les données, voir benchmarks.py compact). Sur les
+    pipelines de croissance et de transpiration, l'écart avec le calcul en
+    float64 est de l'ordre de 1e-5 (cm ou g) sur les séries journalières et
+    les vitesses, et de quelques millièmes de % sur les séries normalisées
+    et les profils ; les NaN sont les mêmes.
+
+    Une colonne entière qui ne tient pas dans un int32 est laissée telle quelle.
+'''
+def to_compact(df):
+    dtypes = {}
+
+    for col, dtype in df.dtypes.items():
+        if pd.api.types.is_integer_dtype(dtype):
+            info = np.iinfo(np.int32)
+            if df[col].min() >= info.min and df[col].max() <= info.max:
+                dtypes[col] = np.int32
+        elif pd.api.types.is_float_dtype(dtype):
+            dtypes[col] = np.float32
+
+    return df.astype(dtypes)
+
+'''
+    Type réel des résultats calculés à partir de données de type `dtype` :
+    float32 pour les données compactes (int32, float32, voir to_compact),
+    float64 sinon.
+'''
+def float_dtype(dtype):
+    return np.float32 if np.dtype(dtype).itemsize <= 4 else np.float64
+
+'''
+    Type réel commun à toutes les colonnes de df (Series ou DataFrame) :
+    float32 seulement si toutes les colonnes sont compactes. A utiliser avec
+    df.to_numpy(dtype=...) plutôt que dtype=float, qui crée une copie float64.
+'''
+def frame_float_dtype(df):
+    dtypes = [df.dtype] if isinstance(df, pd.Series) else list(df.dtypes)
+
+    if dtypes and all(float_dtype(dtype) == np.float32 for dtype in dtypes):
+        return np.float32
+
+    return np.float64
+
+'''
+    Convertit les colonnes entières de x (Series ou DataFrame) en réels de
+    type float_dtype(), les autres colonnes sont inchangées.
+'''
+def as_float(x):
+    if isinstance(x, pd.Series):
+        return x.astype(float_dtype(x.dtype)) if pd.api.types.is_integer_dtype(x.dtype) else x
+
+    return x.astype({col: float_dtype(dtype) for col, dtype in x.dtypes.items()
+                     if pd.api.types.is_integer_dtype(dtype)})
+
+'''
+    Lit les données de `instrument` ('balances', 'croissance' ou 'porometre')
+    pour la campagne `year`, en passant par le cache (voir cache.py). Avec
+    compact=True, les colonnes sont converties en int32/float32 (voir to_compact).
+'''
+def load(instrument, year, compact=False):
+    key = repr((PARSER_VERSION, READ_OPTIONS[instrument], schema(instrument, year)))
+
+    df = read_cached(data_path(instrument, year), _parse(instrument, year), key=key)
+
+    if instrument == 'porometre':
+        df = categorize(df)
+
+    return to_compact(df) if compact else df
+
+def load_balances(year, compact=False):
+    return load('balances', year, compact)
+
+def load_croissance(year, compact=False):
+    return load('croissance', year, compact)
+
+def load_porometre(year, compact=False):
+    return load('porometre', year, compact)
@@ -0,0 +1,146 @@
+import hashlib
+import os
+import pickle
+import sys
+
+from functools import lru_cache
+
+import pandas as pd
+
+'''
+    Cache sur disque des étapes intermédiaires des analyses.
+
+    memo(f, *args, **kwargs) renvoie f(*args, **kwargs) en gardant le résultat
+    dans CACHE_DIR. La clé est une empreinte (SHA-1) :
+        - de la fonction (nom, et code source des modules de ce dossier) ;
+        - de ses entrées (valeurs, index et colonnes des DataFrames/Series) ;
+        - de ses paramètres.
+
+    Si l'on ne change que le dernier paramètre d'une chaîne de calculs (e.g.,
+    la fenêtre du filtre appliqué à la vitesse de transpiration), les étapes
+    précédentes ont les mêmes entrées et sont relues ; seules les étapes
+    suivantes sont recalculées.
+
+    Lorsque la taille totale du cache dépasse MAX_SIZE, les fichiers les moins
+    récemment utilisés sont supprimés.
+'''
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache')
+
+MAX_SIZE = 500 * 2**20
+
+# Mettre à False pour tout recalculer sans lire ni écrire le cache
+ENABLED = True
+
+'''
+    Empreinte des fichiers source du dossier d'un module : le cache est
+    invalidé dès que le code qui calcule une étape (ou une fonction qu'elle
+    appelle, e.g. utils.daily_profile) change.
+'''
+@lru_cache(maxsize=None)
+def _source_digest(module):
+    path = getattr(sys.modules.get(module), '__file__', None)
+
+    if path is None:
+        return b''
+
+    folder = os.path.dirname(os.path.abspath(path))
+    h = hashlib.sha1()
+
+    for name in sorted(os.listdir(folder)):
+        if name.endswith('.py'):
+            with open(os.path.join(folder, name), 'rb') as f:
+                h.update(f.read())
+
+    return h.digest()
+
+def _update(h, obj):
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        h.update(repr((type(obj).__name__, obj.shape, obj.index.name,
+                       obj.columns.tolist() if isinstance(obj, pd.DataFrame) else obj.name,
+                       obj.dtypes.astype(str).tolist() if isinstance(obj, pd.DataFrame) else str(obj.dtype),
+                       str(obj.index.dtype))).encode())
+        h.update(pd.util.hash_pandas_object(obj, index=True).to_numpy().tobytes())
+    elif isinstance(obj, (tuple, list)):
+        h.update(repr((type(obj).__name__, len(obj))).encode())
+        for item in obj:
+            _update(h, item)
+    elif isinstance(obj, dict):
+        for key in sorted(obj):
+            h.update(repr(key).encode())
+            _update(h, obj[key])
+    else:
+        h.update(repr(obj).encode())
+
+def fingerprint(f, args, kwargs):
+    h = hashlib.sha1()
+
+    h.update('{m}.{n}'.format(m=f.__module__, n=f.__qualname__).encode())
+    h.update(_source_digest(f.__module__))
+    _update(h, args)
+    _update(h, kwargs)
+
+    return h.hexdigest()
+
+def _entries():
+    if not os.path.isdir(CACHE_DIR):
+        return []
+
+    with os.scandir(CACHE_DIR) as it:
+        return [entry for entry in it if entry.name.endswith('.pkl')]
+
+'''
+    Supprime les fichiers les moins récemment utilisés jusqu'à ce que le
+    cache fasse au plus `max_size` octets.
+'''
+def evict(max_size=None):
+    max_size = MAX_SIZE if max_size is None else max_size
+
+    entries = sorted(((e.stat().st_mtime_ns, e.stat().st_size, e.path) for e in _entries()),
+                     reverse=True)
+
+    total = 0
+    for _, size, path in entries:
+        total += size
+
+        if total > max_size:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                # Déjà supprimé par un autre processus
+                pass
+
+def clear():
+    evict(0)
+
+def memo(f, *args, **kwargs):
+    if not ENABLED:
+        return f(*args, **kwargs)
+
+    path = os.path.join(CACHE_DIR, fingerprint(f, args, kwargs) + '.pkl')
+
+    try:
+        with open(path, 'rb') as fh:
+            result = pickle.load(fh)
+
+        # La date de modification sert de date de dernière utilisation
+        os.utime(path)
+
+        return result
+    except (OSError, EOFError, pickle.UnpicklingError):
+        # Pas encore calculé, ou fichier illisible : on recalcule
+        pass
+
+    result = f(*args, **kwargs)
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+
+    # Ecriture atomique : plusieurs processus (batch.py) peuvent écrire en même temps
+    tmp = '{p}.{pid}.tmp'.format(p=path, pid=os.getpid())
+    with open(tmp, 'wb') as fh:
+        pickle.dump(result, fh, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+
+    evict()
+
+    return result
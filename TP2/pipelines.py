@@ -0,0 +1,354 @@
+from math import pi
+
+import numpy as np
+import pandas as pd
+
+from loaders import as_float, load_balances, load_croissance, load_porometre
+from memo import memo
+from rate import savgol_rate, smoothed_rate
+from resampling import N_RESAMPLES, compare_groups, regression
+from corrections import apply_corrections
+from regularize import regularize, sampling_period
+from smoothing import rolling_median
+from utils import daily_reset, daily_normalize, daily_profile, positions
+
+'''
+    Calculs des analyses de transpiration, de croissance et du poromètre,
+    sans aucun affichage.
+
+    Chaque fonction compute_*(year) renvoie un dictionnaire de DataFrames
+    (données intermédiaires et résultats), utilisable tel quel ou pour tracer
+    les graphes. Avec compact=True, les données sont lues et traitées en
+    float32 (voir loaders.to_compact) ; seules les vitesses (voir rate.py) sont
+    calculées en float64.
+
+    Les étapes coûteuses (grille régulière, filtres, dérivée, profils)
+    passent par memo.memo : modifier un paramètre ne recalcule que les étapes
+    qui en dépendent.
+'''
+
+PLANTES = ['Plante 1', 'Plante 2', 'Plante 3']
+
+ENCODEURS = ['enc_1', 'enc_2', 'enc_3', 'enc_4', 'enc_6']
+
+# Conversion des données des encodeurs en longueur : le diamètre de la poulie
+# est de 2.6 cm (périmètre = pi * 2.6 cm) et les encodeurs enregistrent chaque
+# 1/80ème de tour de poulie.
+ENCODER_CM = 1/80 * (pi * 2.6)
+
+'''
+    Pour chaque année et chaque encodeur, liste des intervalles de temps
+    (début, fin, plante, rang) correspondant à la croissance d'une seule
+    feuille. Cela permet d'afficher un intervalle dans lequel la feuille
+    mesurée n'a pas été changée, et qui est donc plus facile à interpréter.
+    Un début ou une fin à None signifie "depuis le début" / "jusqu'à la fin".
+'''
+FEUILLES = {
+    2026: {
+        # PLANTE 1
+        # NOTE: on ne garde que les journées complètes, les vraies dates de changement
+        # sont indiquées en commentaire à droite
+        'enc_1': [
+            # La poulie a patiné le 01-02, on ne garde que jusqu'au 31-01
+            ("2026-01-28", "2026-01-31", "Plante 1", "rang 3"), # 02-02-2026 09:15
+            ("2026-02-03", "2026-02-05", "Plante 1", "rang 5"),
+            # Bizarrerie le 07/02, on commence au 08
+            ("2026-02-07", "2026-02-12", "Plante 1", "rang 6") 
+            ],
+        'enc_2': [
+            #("2026-01-27", "2026-01-28 16:05", "Plante 1", "rang 2"),
+            ("2026-01-29", "2026-02-07", "Plante 1", "rang 4"), # 2026-01-28 16:10
+            #("2026-02-14", None, "Plante 2", "rang 7")
+            ],
+        # PLANTE 2
+        'enc_3': [
+            #("2026-01-27", "2026-01-28 16:05", "Plante 2", "rang 2"),
+            # Bug le 05-02, on ne garde que jusqu'au 04-02
+            ("2026-01-29", "2026-02-04", "Plante 2", "rang 4"), # 2026-01-28 16:10
+            ("2026-02-07", "2026-02-12", "Plante 2", "rang 6")
+            ],
+        'enc_4': [
+            ("2026-01-27", "2026-02-01", "Plante 2", "rang 3"), # 2026-02-02 09:15
+            ("2026-02-03", "2026-02-12", "Plante 2", "rang 5"), # 2026-02-02 09:20
+            ],
+        # PLANTE 3
+        'enc_6': [
+            # bug le 01-02, on ne garde que jusqu'au 31-01
+            ("2026-01-27", "2026-01-31", "Plante 3", "rang 3"), # 2026-02-02 09:15
+            ("2026-02-03", "2026-02-12", "Plante 3", "rang 5") # 2026-02-02 09:20
+            ]
+        },
+    2025: {
+        'enc_1': [
+            ("2025-02-01", "2025-02-06", "Plante 1", "rang 3"),
+            ("2025-02-08", None, "Plante 1", "rang 5")
+            ],
+        'enc_2': [
+            ("2025-01-29", "2025-02-02", "Plante 1", "rang 2"),
+            ("2025-02-05", "2025-02-10", "Plante 1", "rang 4"),
+            ("2025-02-13", None, "Plante 1", "rang 6")
+            ],
+        'enc_3': [
+            ("2025-02-01", "2025-02-06",  "Plante 2", "rang 3"),
+            ("2025-02-08", None,  "Plante 2", "rang 5")
+            ],
+        'enc_4': [
+            (None, "2025-02-03",  "Plante 2", "rang 2"),
+            ("2025-02-05", "2025-02-11", "Plante 2", "rang 4"),
+            ("2025-02-13", None,  "Plante 2", "rang 6")
+            ],
+        'enc_6': [
+            (None, "2025-02-03",  "Plante 3", "rang 2"),
+            ("2025-02-05", "2025-02-11", "Plante 3", "rang 4"),
+            ("2025-02-13", None, "Plante 3", "rang 6")
+            ]
+        },
+    2023: {
+        'enc_1': [
+            ("2023-02-12", None, "Plante 1", "rang ?")
+            ],
+        'enc_2': [
+            ("2023-02-09", "2023-02-13", "Plante 1", "rang ?"),
+            ("2023-02-15", None, "Plante 1", "rang ?")
+            ],
+        'enc_3': [
+            ("2023-02-11", None, "Plant 2", "rang ?"),
+            ],
+        'enc_4': [
+            ("2023-02-16", None, "Plant 2", "rang ?")
+            ],
+        'enc_6': [
+            ("2023-02-14", None, "Plant 3", "rang ?")
+            ]
+        },
+    }
+
+'''
+    On ne garde que les journées complètes (sans la première et la dernière).
+    Comme df[days[1]:days[-1]] dans les notebooks d'origine, la borne de fin
+    est incluse : l'échantillon de minuit du dernier jour est conservé.
+'''
+def full_days(df):
+    day = df.index.normalize()
+    days = day.unique()
+
+    return df[(day > days[0]) & (df.index <= days[-1])]
+
+'''
+    Total de chaque journée d'une donnée cumulée journalière (voir
+    utils.daily_reset), indexé par la date.
+'''
+def daily_totals(daily):
+    return daily.groupby(daily.index.normalize()).max()
+
+'''
+    Profil journalier moyen (voir utils.daily_profile) de chaque colonne,
+    indexé par (colonne, créneau horaire).
+'''
+def profiles(df, period):
+    return pd.concat({col: daily_profile(df[col], period) for col in df.columns})
+
+'''
+    Table des feuilles suivies pendant la campagne `year` (voir FEUILLES) :
+    une ligne par segment, c'est-à-dire par intervalle pendant lequel un
+    encodeur a mesuré la même feuille.
+'''
+def leaf_table(year):
+    rows = [(col, start, end, plante, rang)
+            for col, limits in FEUILLES.get(year, {}).items()
+            for start, end, plante, rang in limits]
+
+    table = pd.DataFrame(rows, columns=['encodeur', 'debut', 'fin', 'plante', 'rang'])
+
+    return table.rename_axis('segment').reset_index()
+
+'''
+    Positions [start, stop[ des segments de `table` dans les dates triées
+    `time`, bornes incluses comme df[debut:fin] (une date sans heure désigne
+    toute la journée, None le début ou la fin de la série).
+'''
+def _segment_bounds(time, table):
+    bounds = [positions(time, None if pd.isna(debut) else debut, None if pd.isna(fin) else fin)
+              for debut, fin in zip(table['debut'], table['fin'])]
+
+    start, stop = np.array(bounds, dtype=np.int64).reshape(-1, 2).T
+
+    return start, stop
+
+'''
+    Croissance de chaque feuille, pour tous les segments de `table` (voir
+    leaf_table) en une seule passe : les échantillons de tous les segments
+    sont extraits d'un coup de `daily` (croissance journalière cumulée) et de
+    `daily_norm` (normalisée), puis le profil journalier moyen de chaque
+    segment est calculé par un seul groupby (segment, créneau).
+
+    Renvoie un tableau long : une ligne par (segment, date), avec les
+    colonnes de `table`, 'croissance', 'croissance_norm', 'creneau' (depuis
+    minuit, pas `period`) et 'profil' (moyenne du segment pour ce créneau).
+'''
+def leaf_segments(daily, daily_norm, table, period):
+    time = daily.index.to_numpy()
+    start, stop = _segment_bounds(time, table)
+    lengths = np.maximum(stop - start, 0)
+
+    # Positions des lignes de chaque segment, mises bout à bout
+    segment = np.repeat(np.arange(len(table)), lengths)
+    rows = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths) + start[segment]
+    cols = daily.columns.get_indexer(table['encodeur'])[segment]
+
+    index = daily.index[rows]
+
+    long = table.iloc[segment].reset_index(drop=True)
+    long['time'] = index
+    long['croissance'] = daily.to_numpy()[rows, cols]
+    long['croissance_norm'] = daily_norm.to_numpy()[rows, cols]
+    long['creneau'] = (index - index.normalize()) // pd.Timedelta(period)
+
+    long['profil'] = long.groupby(['segment', 'creneau'])['croissance_norm'].transform('mean')
+
+    return long
+
+'''
+    Poids lus par les balances -> g d'eau évapotranspirés (changement de
+    signe), puis corrections manuelles (voir data/corrections.csv).
+'''
+def water(data, year):
+    return apply_corrections(-data, 'balances', year, 'converti')
+
+'''
+    Evapotranspiration cumulée des plantes et évaporation moyenne des pots
+    témoins ('evap').
+'''
+def evapotranspiration(water):
+    et = water[['plant_1', 'plant_2', 'plant_3']].copy()
+    et['evap'] = water[['tem_1', 'tem_2', 'tem_3']].mean(axis=1)
+
+    return et
+
+'''
+    Transpiration cumulée : évapotranspiration - évaporation.
+'''
+def transpiration(et):
+    trans = et[['plant_1', 'plant_2', 'plant_3']].sub(et['evap'], axis="rows")
+    trans.columns = PLANTES
+
+    return trans
+
+def prepare_balances(data, year):
+    return transpiration(evapotranspiration(water(data, year)))
+
+'''
+    Données des encodeurs -> élongation cumulée [cm], avec les corrections
+    manuelles sur les données brutes. Le 5e encodeur n'est pas utilisé.
+'''
+def elongation(df, year):
+    df = df.drop(columns=['enc_5'])
+    df = apply_corrections(df, 'croissance', year, 'brut')
+
+    # Le sens dans lequel l'encodeur tourne n'a pas d'importance. as_float :
+    # des pas en int32 (voir loaders.to_compact) donnent des cm en float32
+    return as_float(abs(df)) * ENCODER_CM
+
+def prepare_croissance(df, year):
+    return apply_corrections(elongation(df, year), 'croissance', year, 'converti')
+
+def compute_transpiration(year, window=21, speed_window=11, compact=False):
+    r = {}
+
+    r['eau'] = water(load_balances(year, compact), year)
+    r['evapotranspiration'] = evapotranspiration(r['eau'])
+    r['transpiration'] = transpiration(r['evapotranspiration'])
+
+    trans, r['trous'] = memo(regularize, r['transpiration'])
+    r['periode'] = sampling_period(trans.index)
+
+    # Filtre pour réduire le bruit et supprimer les glitches
+    r['filtree'] = memo(rolling_median, trans, window)
+    r['cumulee'] = full_days(r['filtree'])
+
+    r['journaliere'] = daily_reset(r['cumulee'])
+    r['journaliere_norm'] = daily_normalize(r['journaliere'])
+    r['totaux'] = daily_totals(r['journaliere'])
+    r['profils'] = memo(profiles, r['journaliere_norm'], r['periode'])
+
+    # Vitesse de transpiration [g d'eau/heure] : dérivée filtrée par une
+    # médiane glissante sur `speed_window` échantillons
+    r['vitesse'] = memo(smoothed_rate, r['cumulee'], speed_window)
+    r['vitesse_norm'] = daily_normalize(r['vitesse'])
+    r['profils_vitesse'] = memo(profiles, r['vitesse_norm'], r['periode'])
+
+    return r
+
+def compute_growth(year, window=51, speed_window='2h', compact=False):
+    r = {}
+
+    r['brutes'] = elongation(load_croissance(year, compact), year)
+    r['corrigees'] = apply_corrections(r['brutes'], 'croissance', year, 'converti')
+
+    df, r['trous'] = memo(regularize, r['corrigees'])
+    r['periode'] = sampling_period(df.index)
+
+    r['filtrees'] = memo(rolling_median, df, window)
+    r['completes'] = full_days(r['filtrees'])
+
+    r['journaliere'] = daily_reset(r['completes'])
+    r['journaliere_norm'] = daily_normalize(r['journaliere'])
+    r['totaux'] = daily_totals(r['journaliere'])
+    r['profils'] = memo(profiles, r['journaliere_norm'], r['periode'])
+
+    # Vitesse d'élongation [cm/heure] : filtre de Savitzky-Golay (les
+    # encodeurs avancent par pas, la médiane de leur dérivée est nulle). La
+    # fenêtre est une durée : le pas des encodeurs change selon les années.
+    r['vitesse'] = memo(savgol_rate, r['completes'], speed_window)
+
+    # Croissance feuille par feuille (voir FEUILLES)
+    r['feuilles'] = leaf_segments(r['journaliere'], r['journaliere_norm'],
+                                  leaf_table(year), r['periode'])
+
+    return r
+
+'''
+    Période sur laquelle comparer les rangs des feuilles au poromètre (toute
+    la campagne si l'année n'est pas reprise).
+'''
+PERIODES_RANG = {
+    2026: ('2026-02-10', '2026-02-17'),
+    }
+
+def compute_porometre(year, n_resamples=N_RESAMPLES, workers=None):
+    from scipy.stats import linregress
+
+    r = {}
+
+    df = load_porometre(year)
+    df['heure'] = df['time'].dt.hour
+    r['donnees'] = df
+
+    # nan_policy='omit' car PAR n'a pas toujours été mesuré. La p-valeur
+    # (test t) est complétée par les intervalles de confiance bootstrap et
+    # un test de permutation (voir resampling.py).
+    lreg = linregress(df['PAR'], df['cond'], nan_policy='omit')
+    r['regression'] = regression(df, 'PAR', 'cond', n_resamples=n_resamples, workers=workers)
+    r['regression']['p'] = lreg.pvalue
+
+    if year in PERIODES_RANG:
+        r['rang'] = df[df['time'].between(*PERIODES_RANG[year])]
+    else:
+        r['rang'] = df
+
+    for group in ['face_f', 'heure', 'état_f']:
+        r['cond_' + group] = df.groupby(group, observed=True)['cond'].describe()
+
+    r['cond_rang_f'] = r['rang'].groupby('rang_f', observed=True)['cond'].describe()
+    r['par_heure'] = df.groupby('heure', observed=True)['PAR'].describe()
+
+    # Comparaison de la conductance entre les groupes : moyenne, intervalle
+    # de confiance et p-valeur d'un test de permutation, en un tableau long
+    comparisons = {group: compare_groups(r['rang'] if group == 'rang_f' else df, group, 'cond',
+                                         n_resamples=n_resamples, workers=workers)
+                   for group in ['face_f', 'rang_f', 'heure', 'état_f']}
+    r['comparaisons'] = pd.concat({group: table.rename_axis('modalite').reset_index()
+                                   for group, table in comparisons.items()},
+                                  names=['variable', None]).reset_index(level=0).reset_index(drop=True)
+
+    return r
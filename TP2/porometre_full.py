@@ -1,175 +1,170 @@
-import pandas as pd
-
-from scipy.stats import linregress
-
 import matplotlib.pyplot as plt
 
 import seaborn as sns
 
-year = 2026
-
-# About encoding='latin-1' : https://stackoverflow.com/questions/5552555/unicodedecodeerror-invalid-continuation-byte#31492722
-if year == 2026:
-    df = pd.read_csv('data/porometre-{year}.csv'.format(year=year), sep=';',
-                     encoding="latin-1")
-else:
-   df = pd.read_csv('data/porometre-{year}.csv'.format(year=year), sep=';',
-                    encoding='latin-1')     
-
-df['time'] = df['date'] + ' ' + df['heure']
-
-if year == 2026:
-    df['time'] = pd.to_datetime(df['time'], format='%d/%m/%Y %H:%M') 
-else:
-    df['time'] = pd.to_datetime(df['time'], format='%d-%m-%y %H:%M')                            
-
-df = df.drop(columns=['date', 'heure'])
+from pipelines import compute_porometre
 
 '''
-    Nuage de points : conductance stomatique vs. PAR + régression linéaire
-    
-    Note, il est aussi possible d'utiliser 
-    ax = df.plot.scatter(x='PAR', y='cond')
-'''
-fig, ax = plt.subplots(figsize=(8,4))
-
-ax.plot(df['PAR'], df['cond'], 'o', label="Données mesurées")
-
-# Régression linéaire avec scipy.stats.linregress
-lreg = linregress(df['PAR'], df['cond'], nan_policy='omit')
+    Affichage de l'analyse des mesures au poromètre.
 
-ax.plot(df['PAR'], lreg.intercept + lreg.slope*df['PAR'], 'r', label="Régression linéaire")
-ax.text(50, 500, "$R^2 = $" + "{0:.2f} (Pearson)".format(lreg.rvalue ** 2))
-
-ax.spines[["top", "right"]].set_visible(False)
+    Tous les calculs (régression, statistiques par groupe) sont faits par
+    pipelines.compute_porometre ; ce script ne fait que les afficher.
+    Utilisation : python porometre_full.py
+'''
 
-ax.set_ylim(bottom=0)
+YEAR = 2026
 
-ax.set_title("Conductance stomatique vs. PAR", pad=15)
-ax.set_ylabel("mmol/m²/s")
-ax.set_xlabel("µmol/m²/s")
-ax.legend()
-ax.grid(linestyle='--', alpha=0.5)
-plt.show()
+def plot_porometre(r, year):
+    df = r['donnees']
+    lreg = r['regression']
 
-'''
-    Conductance stomatique vs. face de la feuille
-'''
-print("\nConductance stomatique vs. face de la feuille".upper())
-print(df.groupby('face_f')['cond'].describe())
+    '''
+        Nuage de points : conductance stomatique vs. PAR + régression linéaire
 
-fig, ax = plt.subplots(figsize=(8,4))
+        Note, il est aussi possible d'utiliser
+        ax = df.plot.scatter(x='PAR', y='cond')
+    '''
+    fig, ax = plt.subplots(figsize=(8,4))
 
-ax = sns.boxplot(data=df, x='face_f', y='cond', ax=ax)
-ax = sns.stripplot(data=df, x='face_f', y='cond', size=4, ax=ax)
+    ax.plot(df['PAR'], df['cond'], 'o', label="Données mesurées")
 
-ax.spines[["top", "right"]].set_visible(False)
-ax.set_ylim(bottom=0, top=600)
-ax.set_title("Conductance stomatique vs. face de la feuille", pad=15)
-ax.set_ylabel("mmol/m²/s")
-ax.set_xlabel("Face")
-ax.grid(linestyle='--', alpha=0.5)
+    ax.plot(df['PAR'], lreg['ordonnee'] + lreg['pente']*df['PAR'], 'r', label="Régression linéaire")
+    ax.text(50, 500, "$R^2 = $" + "{0:.2f} (Pearson)".format(lreg['r2']))
+    ax.text(50, 450, "pente = {0:.2f} [{1:.2f}, {2:.2f}], p = {3:.3f} (permutation)".format(
+        lreg['pente'], lreg['pente_ic_bas'], lreg['pente_ic_haut'], lreg['p_permutation']))
 
-plt.show()
+    ax.spines[["top", "right"]].set_visible(False)
 
+    ax.set_ylim(bottom=0)
 
-'''
-    Conductance stomatique en fonction du rang de la feuille
-'''
-data = df[df['time'].between('2026-02-10', '2026-02-17')]
+    ax.set_title("Conductance stomatique vs. PAR", pad=15)
+    ax.set_ylabel("mmol/m²/s")
+    ax.set_xlabel("µmol/m²/s")
+    ax.legend()
+    ax.grid(linestyle='--', alpha=0.5)
+    plt.show()
 
-print("\nConductance stomatique vs. rang de la feuille".upper())
-print(data.groupby('rang_f')['cond'].describe())
+    '''
+        Conductance stomatique vs. face de la feuille
+    '''
+    print("\nConductance stomatique vs. face de la feuille".upper())
+    print(r['cond_face_f'])
 
-ax = sns.boxplot(data=data,
-                 x='rang_f', y='cond',)
-                 #order=['{0}-{1}'.format(i, i+1) for i in range(1, 19, 2)])
-ax = sns.stripplot(data=data,
-                   x='rang_f', y='cond', size=4)
+    fig, ax = plt.subplots(figsize=(8,4))
 
-ax.set_title("Conductance stomatique vs. rang de la feuille")
-ax.set_ylabel("mmol/m²/s")
-ax.set_xlabel("rang de la feuille")
-ax.grid(linestyle='--', alpha=0.5)
+    ax = sns.boxplot(data=df, x='face_f', y='cond', ax=ax)
+    ax = sns.stripplot(data=df, x='face_f', y='cond', size=4, ax=ax)
 
-plt.show()
+    ax.spines[["top", "right"]].set_visible(False)
+    ax.set_ylim(bottom=0, top=600)
+    ax.set_title("Conductance stomatique vs. face de la feuille", pad=15)
+    ax.set_ylabel("mmol/m²/s")
+    ax.set_xlabel("Face")
+    ax.grid(linestyle='--', alpha=0.5)
 
-'''
-    Conductance stomatique en fonction de l'heure
-'''
-df['heure'] = df['time'].dt.hour
+    plt.show()
 
-print("\nConductance stomatique vs. heure".upper())
-print(df.groupby('heure')['cond'].describe())
+    '''
+        Conductance stomatique en fonction du rang de la feuille
+        (voir pipelines.PERIODES_RANG)
+    '''
+    print("\nConductance stomatique vs. rang de la feuille".upper())
+    print(r['cond_rang_f'])
 
-ax = sns.boxplot(data=df, x='heure', y='cond')
-ax = sns.stripplot(data=df, x='heure', y='cond', size=4)
+    ax = sns.boxplot(data=r['rang'],
+                     x='rang_f', y='cond',)
+                     #order=['{0}-{1}'.format(i, i+1) for i in range(1, 19, 2)])
+    ax = sns.stripplot(data=r['rang'],
+                       x='rang_f', y='cond', size=4)
 
-ax.set_title("Conductance stomatique vs. heure")
-ax.set_ylabel("mmol/m²/s")
-ax.set_xlabel("Heure")
-ax.grid(linestyle='--', alpha=0.5)
+    ax.set_title("Conductance stomatique vs. rang de la feuille")
+    ax.set_ylabel("mmol/m²/s")
+    ax.set_xlabel("rang de la feuille")
+    ax.grid(linestyle='--', alpha=0.5)
 
-plt.show()
+    plt.show()
 
-'''
-    PAR en fonction de l'heure
-'''
-print("\nPAR vs. heure".upper())
-print(df.groupby('heure')['PAR'].describe())
+    '''
+        Conductance stomatique en fonction de l'heure
+    '''
+    print("\nConductance stomatique vs. heure".upper())
+    print(r['cond_heure'])
 
-ax = sns.boxplot(data=df, x='heure', y='PAR')
-ax = sns.stripplot(data=df, x='heure', y='PAR', size=4)
+    ax = sns.boxplot(data=df, x='heure', y='cond')
+    ax = sns.stripplot(data=df, x='heure', y='cond', size=4)
 
-ax.set_title("PAR vs. heure")
-ax.set_ylabel("µmol/m²/s")
-ax.set_xlabel("Heure")
-ax.grid(linestyle='--', alpha=0.5)
+    ax.set_title("Conductance stomatique vs. heure")
+    ax.set_ylabel("mmol/m²/s")
+    ax.set_xlabel("Heure")
+    ax.grid(linestyle='--', alpha=0.5)
 
-plt.show()
+    plt.show()
 
-'''
-    Conductance stomatique vs. face de la feuille en fonction de l'heure
-'''
+    '''
+        PAR en fonction de l'heure
+    '''
+    print("\nPAR vs. heure".upper())
+    print(r['par_heure'])
 
-ax = sns.boxplot(data=df, x='heure', y='cond', hue='face_f')
-#ax = sns.stripplot(data=df, x='heure', y='cond', hue='face_f')
+    ax = sns.boxplot(data=df, x='heure', y='PAR')
+    ax = sns.stripplot(data=df, x='heure', y='PAR', size=4)
 
-ax.set_title("Conductance stomatique vs. heure et face de la feuille")
-ax.set_ylabel("mmol/m²/s")
-ax.set_xlabel("Heure")
-ax.grid(linestyle='--', alpha=0.5)
+    ax.set_title("PAR vs. heure")
+    ax.set_ylabel("µmol/m²/s")
+    ax.set_xlabel("Heure")
+    ax.grid(linestyle='--', alpha=0.5)
 
-plt.show()
+    plt.show()
 
-'''
-    Conductance stomatique vs. position sur la feuille
-'''
+    '''
+        Conductance stomatique vs. face de la feuille en fonction de l'heure
+    '''
+    ax = sns.boxplot(data=df, x='heure', y='cond', hue='face_f')
+    #ax = sns.stripplot(data=df, x='heure', y='cond', hue='face_f')
 
-if year < 2026:
-    ax = sns.boxplot(data=df, x='pos_f', y='cond')
-    ax = sns.stripplot(data=df, x='pos_f', y='cond')
-    
     ax.set_title("Conductance stomatique vs. heure et face de la feuille")
     ax.set_ylabel("mmol/m²/s")
     ax.set_xlabel("Heure")
     ax.grid(linestyle='--', alpha=0.5)
-    
+
     plt.show()
 
+    '''
+        Conductance stomatique vs. position sur la feuille
+    '''
+    if year < 2026:
+        ax = sns.boxplot(data=df, x='pos_f', y='cond')
+        ax = sns.stripplot(data=df, x='pos_f', y='cond')
 
-'''
-    Conductance stomatique vs. état de la feuille
-'''
+        ax.set_title("Conductance stomatique vs. heure et face de la feuille")
+        ax.set_ylabel("mmol/m²/s")
+        ax.set_xlabel("Heure")
+        ax.grid(linestyle='--', alpha=0.5)
 
-ax = sns.boxplot(data=df, x='état_f', y='cond')
-ax = sns.stripplot(data=df, x='état_f', y='cond')
+        plt.show()
 
-ax.set_title("Conductance stomatique vs. face et état de la feuille")
-ax.set_ylabel("mmol/m²/s")
-ax.set_xlabel("Etat de la feuille")
-ax.grid(linestyle='--', alpha=0.5)
+    '''
+        Conductance stomatique vs. état de la feuille
+    '''
+    ax = sns.boxplot(data=df, x='état_f', y='cond')
+    ax = sns.stripplot(data=df, x='état_f', y='cond')
+
+    ax.set_title("Conductance stomatique vs. face et état de la feuille")
+    ax.set_ylabel("mmol/m²/s")
+    ax.set_xlabel("Etat de la feuille")
+    ax.grid(linestyle='--', alpha=0.5)
+
+    plt.show()
 
-plt.show()
+    '''
+        Moyennes par groupe, intervalles de confiance (bootstrap) et p-valeurs
+        des tests de permutation (voir resampling.compare_groups)
+    '''
+    print("\nConductance stomatique : comparaison des groupes".upper())
+    print(r['comparaisons'].to_string(index=False))
 
+def main(year=YEAR):
+    plot_porometre(compute_porometre(year), year)
 
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,177 @@
+import numbers
+
+import numpy as np
+import pandas as pd
+
+from smoothing import as_window, rolling_median, sampling_step
+
+'''
+    Vitesse (dérivée par rapport au temps) de données cumulées, par heure.
+
+    La dérivée est calculée sur les vraies dates des échantillons (pas
+    forcément régulières), pour toutes les colonnes en une seule opération
+    sur le tableau 2D.
+
+    Sans fenêtre, c'est une différence finie (np.gradient à pas non uniforme).
+    Avec une fenêtre, c'est la pente d'une régression linéaire locale sur
+    les échantillons compris dans [t - window/2, t + window/2] : la dérivée et
+    le lissage sont faits en une seule passe. Sur une grille régulière sans
+    NaN, c'est exactement le filtre de Savitzky-Golay d'ordre 1 (dérivée).
+    Toutes les sommes de la régression sont obtenues par différence de sommes
+    cumulées : le coût ne dépend pas de la taille de la fenêtre.
+
+    Les pipelines (voir pipelines.py) travaillent sur la grille régulière :
+        - transpiration : smoothed_rate, np.gradient puis filtre médian,
+          robuste aux glitches des balances ;
+        - croissance : savgol_rate, filtre de Savitzky-Golay (scipy) en une
+          passe, car la médiane de la dérivée des encodeurs (en escalier) est
+          nulle.
+    Voir benchmarks.py rate pour les temps de calcul.
+'''
+
+HOUR = pd.Timedelta(hours=1)
+
+def _hours(index):
+    return (index - index[0]) / HOUR
+
+'''
+    Dérivée par différences finies sur les dates réelles de df (Series ou
+    DataFrame), en [unité/heure]. Les NaN se propagent aux voisins.
+'''
+def derivative(df):
+    t = np.asarray(_hours(df.index), dtype=float)
+    values = df.to_numpy(dtype=float)
+
+    # Grille régulière (voir regularize.regularize) : pas constant, exact
+    steps = np.diff(df.index.to_numpy())
+    if len(steps) > 0 and (steps == steps[0]).all():
+        out = np.gradient(values, steps[0] / HOUR.to_timedelta64(), axis=0)
+    else:
+        out = np.gradient(values, t, axis=0)
+
+    if isinstance(df, pd.Series):
+        return pd.Series(out, index=df.index, name=df.name)
+
+    return pd.DataFrame(out, index=df.index, columns=df.columns)
+
+'''
+    Pentes des fenêtres [lo, hi[ (positions dans t et x), calculées par
+    différences de sommes cumulées. t et x sont exprimés par rapport à leur
+    première valeur : la pente n'en dépend pas, et les sommes cumulées restent
+    petites (pas de perte de précision par différence de grands nombres).
+'''
+def _slopes(t, x, lo, hi, min_periods):
+    present = ~np.isnan(x)
+
+    t = (t - t[0])[:, None]
+    x = np.where(present, x - np.nanmin(x, axis=0, initial=np.inf, where=present), 0)
+
+    # Sans NaN, les sommes qui ne dépendent que des dates sont communes à
+    # toutes les colonnes : on ne les calcule qu'une fois
+    w = present.astype(float) if not present.all() else np.ones((len(t), 1))
+
+    def window_sum(a):
+        c = np.zeros((len(a) + 1, a.shape[1]))
+        np.cumsum(a, axis=0, out=c[1:])
+
+        return c[hi] - c[lo]
+
+    n = window_sum(w)
+    st = window_sum(w * t)
+    stt = window_sum(w * t**2)
+    sx = window_sum(x)
+    stx = window_sum(x * t)
+
+    den = n * stt - st**2
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out = (n * stx - st * sx) / den
+
+    out[np.broadcast_to((n < max(min_periods, 2)) | (den <= 0), out.shape)] = np.nan
+
+    return out
+
+'''
+    Pente de la régression linéaire locale centrée de chaque colonne de df,
+    sur une fenêtre `window` (durée, ou nombre d'échantillons comme pour
+    smoothing.rolling_median), en [unité/heure].
+
+    Les NaN sont ignorés ; la pente vaut NaN s'il y a moins de `min_periods`
+    échantillons dans la fenêtre.
+
+    La série est traitée par blocs de `block` lignes (plus les lignes des
+    fenêtres qui débordent du bloc), pour que les sommes cumulées restent
+    précises sur une année d'échantillons.
+'''
+def local_slope(df, window, min_periods=3, block=4096):
+    half = as_window(df.index, window) / 2
+
+    t = np.asarray(_hours(df.index), dtype=float)
+    values = df.to_numpy(dtype=float).reshape(len(df), -1)
+
+    # Bornes des fenêtres, calculées sur les dates exactes (entiers)
+    time = df.index.to_numpy()
+    lo = np.searchsorted(time, time - half.to_timedelta64(), side='left')
+    hi = np.searchsorted(time, time + half.to_timedelta64(), side='right')
+
+    out = np.empty_like(values)
+    for start in range(0, len(df), block):
+        stop = min(start + block, len(df))
+        a, b = lo[start], hi[stop - 1]
+
+        out[start:stop] = _slopes(t[a:b], values[a:b],
+                                  lo[start:stop] - a, hi[start:stop] - a, min_periods)
+
+    if isinstance(df, pd.Series):
+        return pd.Series(out[:, 0], index=df.index, name=df.name)
+
+    return pd.DataFrame(out, index=df.index, columns=df.columns)
+
+'''
+    Nombre (impair) d'échantillons de la grille régulière couverts par
+    `window` (durée, ou déjà un nombre d'échantillons).
+'''
+def _samples(index, window):
+    if isinstance(window, numbers.Integral):
+        return window
+
+    return round(pd.Timedelta(window) / sampling_step(index)) // 2 * 2 + 1
+
+'''
+    Dérivée (voir derivative) lissée par une médiane glissante (voir
+    smoothing.rolling_median) sur `window` (nombre d'échantillons, ou durée
+    convertie en nombre d'échantillons pour utiliser le filtre de scipy), en
+    [unité/heure].
+
+    Ne convient pas aux données en escalier (e.g., encodeurs à la minute,
+    qui restent plusieurs échantillons sur le même pas) : la dérivée y est
+    nulle la plupart du temps, et sa médiane aussi. Voir savgol_rate.
+'''
+def smoothed_rate(df, window):
+    return rolling_median(derivative(df), _samples(df.index, window))
+
+'''
+    Dérivée par le filtre de Savitzky-Golay d'ordre 1 (scipy.signal.savgol_filter,
+    deriv=1) sur `window`, en une seule passe sur la grille régulière, en
+    [unité/heure] : pente de la droite des moindres carrés de chaque fenêtre,
+    comme local_slope. Les NaN se propagent à toute la fenêtre.
+'''
+def savgol_rate(df, window):
+    # Import différé : scipy.signal n'est chargé qu'au premier appel
+    from scipy.signal import savgol_filter
+
+    step = sampling_step(df.index) / HOUR
+    values = df.to_numpy(dtype=float)
+
+    out = savgol_filter(values, _samples(df.index, window), polyorder=1, deriv=1,
+                        delta=step, axis=0, mode='interp')
+
+    if isinstance(df, pd.Series):
+        return pd.Series(out, index=df.index, name=df.name)
+
+    return pd.DataFrame(out, index=df.index, columns=df.columns)
+
+'''
+    Vitesse de df : local_slope si une fenêtre est donnée, derivative sinon.
+'''
+def rate(df, window=None):
+    return derivative(df) if window is None else local_slope(df, window)
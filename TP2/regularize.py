@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+
+from loaders import frame_float_dtype
+from smoothing import sampling_step
+
+'''
+    Mise des séries sur une grille temporelle parfaitement régulière.
+
+    Les data loggers dérivent : en 2026, les encodeurs enregistrent à des
+    secondes "bizarres" (10:12:58, ...), les dates des balances de 2025 sont
+    des fractions de jours Excel, et il manque parfois des mesures. Une fois
+    les données replacées sur une grille régulière, la période
+    d'échantillonnage est connue exactement et les traitements suivants
+    (filtres, dérivées, profils journaliers) peuvent travailler à pas fixe.
+'''
+
+'''
+    Période d'échantillonnage d'une série, détectée comme l'écart médian entre
+    deux dates successives et arrondie à `resolution`.
+'''
+def sampling_period(index, resolution='1s'):
+    return sampling_step(index).round(resolution)
+
+'''
+    Interpole linéairement df (Series ou DataFrame) sur une grille régulière
+    de pas `period` (par défaut, la période détectée), alignée sur les
+    multiples de `period` depuis minuit.
+
+    Les points de la grille situés dans un trou de plus de `max_gap` (par
+    défaut 3 périodes) entre deux mesures ne sont pas interpolés : ils valent
+    NaN et sont signalés dans le masque renvoyé.
+
+    Les données compactes (voir loaders.to_compact) sont interpolées en
+    float32, les autres en float64.
+
+    Renvoie (données sur la grille, masque des trous).
+'''
+def regularize(df, period=None, max_gap=None):
+    period = sampling_period(df.index) if period is None else pd.Timedelta(period)
+    max_gap = 3 * period if max_gap is None else pd.Timedelta(max_gap)
+
+    grid = pd.date_range(df.index[0].ceil(period), df.index[-1].floor(period),
+                         freq=period, name=df.index.name)
+
+    t = df.index.to_numpy()
+    g = grid.to_numpy().astype(t.dtype)
+
+    # Mesures encadrant chaque point de la grille
+    right = np.clip(np.searchsorted(t, g, side='left'), 0, len(t) - 1)
+    left = np.where(t[right] == g, right, np.maximum(right - 1, 0))
+
+    dt = (t[right] - t[left]).astype(float)
+    w = np.divide((g - t[left]).astype(float), dt, out=np.zeros(len(g)), where=dt > 0)
+
+    dtype = frame_float_dtype(df)
+    w = w.astype(dtype)
+
+    values = df.to_numpy(dtype=dtype).reshape(len(df), -1)
+    # Forme a + (b - a) w plutôt que a (1 - w) + b w : entre deux mesures
+    # égales, le résultat vaut exactement a (pas de bruit d'arrondi sur les
+    # paliers, qui deviendrait 0-100 % une fois la journée normalisée)
+    out = values[left] + (values[right] - values[left]) * w[:, None]
+
+    gap = (t[right] - t[left]) > max_gap.to_timedelta64()
+    out[gap] = np.nan
+
+    if isinstance(df, pd.Series):
+        return (pd.Series(out[:, 0], index=grid, name=df.name),
+                pd.Series(gap, index=grid, name=df.name))
+
+    return (pd.DataFrame(out, index=grid, columns=df.columns),
+            pd.DataFrame(np.repeat(gap[:, None], len(df.columns), axis=1),
+                         index=grid, columns=df.columns))
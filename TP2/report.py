@@ -0,0 +1,135 @@
+import argparse
+import html
+import os
+import importlib
+import pickle
+
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+matplotlib.use('Agg')
+
+import matplotlib.pyplot as plt
+
+from loaders import SCHEMAS
+
+'''
+    Génération de toutes les figures des analyses, sans affichage.
+
+    La fonction main(year) de chaque script d'analyse est appelée pour chaque
+    campagne disponible (voir loaders.SCHEMAS), avec le backend non
+    interactif 'Agg' ; plt.show() est remplacé par une fonction qui récupère
+    les figures ouvertes au lieu de les afficher. Ces figures constituent la liste des "travaux" à
+    effectuer : elles sont ensuite enregistrées (PNG, SVG, PDF, ...) en
+    parallèle par un ensemble de processus, puis un index HTML est écrit.
+
+    Utilisation : python report.py [--out rapport] [--formats png pdf] [script ...]
+'''
+
+# Script d'analyse -> instrument dont il trace les campagnes
+SCRIPTS = {
+    'croissance_full.py': 'croissance',
+    'transpiration_full.py': 'balances',
+    'porometre_full.py': 'porometre',
+    }
+
+def _title(fig):
+    if fig.get_suptitle():
+        return fig.get_suptitle()
+
+    for ax in fig.axes:
+        if ax.get_title():
+            return ax.get_title()
+
+    return ''
+
+'''
+    Exécute main(year) de `script` et renvoie la liste de ses figures, sous
+    forme de travaux (nom, titre, figure sérialisée).
+'''
+def collect_jobs(script, year):
+    module = os.path.splitext(os.path.basename(script))[0]
+    name = '{m}-{y}'.format(m=module, y=year)
+    jobs = []
+
+    def collect(*args, **kwargs):
+        for num in plt.get_fignums():
+            fig = plt.figure(num)
+            jobs.append(('{n}-{i:03d}'.format(n=name, i=len(jobs) + 1),
+                         _title(fig),
+                         pickle.dumps(fig)))
+            plt.close(fig)
+
+    show = plt.show
+    plt.show = collect
+
+    try:
+        importlib.import_module(module).main(year)
+        # Figures créées sans appel à plt.show() (e.g., df.plot())
+        collect()
+    finally:
+        plt.show = show
+
+    return jobs
+
+'''
+    Enregistre une figure dans chacun des `formats`. Renvoie les fichiers écrits.
+'''
+def render(job, out, formats):
+    name, _, data = job
+    fig = pickle.loads(data)
+
+    paths = []
+    for fmt in formats:
+        path = os.path.join(out, '{n}.{f}'.format(n=name, f=fmt))
+        fig.savefig(path, bbox_inches='tight')
+        paths.append(path)
+
+    plt.close(fig)
+
+    return paths
+
+def write_index(out, jobs, formats):
+    rows = []
+    for name, title, _ in jobs:
+        links = ' '.join('<a href="{n}.{f}">{f}</a>'.format(n=name, f=fmt) for fmt in formats)
+        image = '<img src="{n}.png" width="600">'.format(n=name) if 'png' in formats else ''
+
+        rows.append('<h2>{n} - {t}</h2>\n<p>{l}</p>\n{i}'.format(n=name, t=html.escape(title),
+                                                                l=links, i=image))
+
+    with open(os.path.join(out, 'index.html'), 'w', encoding='utf-8') as f:
+        f.write('<!DOCTYPE html>\n<html><head><meta charset="utf-8"><title>Rapport</title></head>\n<body>\n')
+        f.write('\n'.join(rows))
+        f.write('\n</body></html>\n')
+
+'''
+    Exécute les `scripts` pour toutes leurs campagnes (en parallèle) puis enregistre toutes leurs figures
+    dans `out` (en parallèle également). Renvoie la liste des travaux.
+'''
+def build_report(scripts=SCRIPTS, out='rapport', formats=('png',), workers=None):
+    os.makedirs(out, exist_ok=True)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        runs = [(script, year) for script in scripts for year in sorted(SCHEMAS[SCRIPTS[os.path.basename(script)]])]
+        jobs = [job for run_jobs in pool.map(collect_jobs, *zip(*runs)) for job in run_jobs]
+
+        futures = [pool.submit(render, job, out, formats) for job in jobs]
+        for future in futures:
+            future.result()
+
+    write_index(out, jobs, formats)
+
+    return jobs
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Génère toutes les figures des analyses.")
+    parser.add_argument('scripts', nargs='*', default=list(SCRIPTS))
+    parser.add_argument('--out', default='rapport')
+    parser.add_argument('--formats', nargs='+', default=['png'])
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    jobs = build_report(args.scripts, args.out, args.formats, args.workers)
+
+    print("{n} figures écrites dans {o}".format(n=len(jobs), o=args.out))
@@ -0,0 +1,173 @@
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+'''
+    Intervalles de confiance (bootstrap) et tests de permutation pour les
+    mesures du poromètre.
+
+    Tous les rééchantillonnages d'un lot sont tirés en une fois, sous forme
+    d'une matrice (rééchantillons x mesures), et la statistique est calculée
+    pour toutes les lignes de la matrice à la fois. Les rééchantillonnages
+    sont découpés en lots de `batch` lignes pour limiter la mémoire ; avec
+    `workers` > 1, les lots sont répartis sur plusieurs processus. Chaque lot
+    a son propre générateur (np.random.SeedSequence.spawn) : les résultats ne
+    dépendent que de `seed`, pas du nombre de processus.
+'''
+
+N_RESAMPLES = 10000
+
+BATCH = 10000
+
+LEVEL = 0.95
+
+'''
+    Exécute task(size, seed) sur des lots de `batch` rééchantillonnages (au
+    total `n_resamples`) et concatène les résultats.
+'''
+def _run(task, n_resamples, seed, workers=None, batch=BATCH):
+    sizes = [min(batch, n_resamples - start) for start in range(0, n_resamples, batch)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+
+    if workers is not None and workers > 1 and len(sizes) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(task, sizes, seeds))
+    else:
+        results = list(map(task, sizes, seeds))
+
+    return np.concatenate(results)
+
+def _interval(values, level):
+    alpha = (1 - level) / 2
+
+    return np.nanquantile(values, [alpha, 1 - alpha], axis=0)
+
+'''
+    Moyennes de `size` rééchantillons bootstrap (tirage avec remise) de x.
+'''
+def _bootstrap_means(x, size, seed):
+    rng = np.random.default_rng(seed)
+
+    return x[rng.integers(0, len(x), size=(size, len(x)))].mean(axis=1)
+
+'''
+    Somme des carrés inter-groupes de `size` permutations de x entre les
+    groupes `codes` (0 à k-1). Les effectifs des groupes ne changent pas
+    d'une permutation à l'autre : seules les sommes par groupe sont
+    calculées, pour toutes les permutations en un seul np.bincount.
+'''
+def _permuted_between(x, codes, k, size, seed):
+    rng = np.random.default_rng(seed)
+
+    permuted = rng.permuted(np.broadcast_to(x, (size, len(x))), axis=1)
+    rows = (codes + k * np.arange(size)[:, None]).ravel()
+
+    sums = np.bincount(rows, weights=permuted.ravel(), minlength=size * k).reshape(size, k)
+
+    return _between(sums, np.bincount(codes, minlength=k), x.sum(), len(x))
+
+def _between(sums, counts, total, n):
+    return (sums**2 / counts).sum(axis=-1) - total**2 / n
+
+'''
+    Compare `value` entre les modalités de `group` dans df :
+        - moyenne de chaque groupe et son intervalle de confiance bootstrap
+          (niveau `level`) ;
+        - p-valeur d'un test de permutation de l'égalité des moyennes
+          (somme des carrés inter-groupes, i.e. ANOVA à un facteur sans
+          hypothèse de normalité ; test bilatéral pour deux groupes).
+
+    Renvoie un tableau avec une ligne par groupe.
+'''
+def compare_groups(df, group, value='cond', n_resamples=N_RESAMPLES, level=LEVEL,
+                   seed=0, workers=None):
+    data = df[[group, value]].dropna()
+
+    groups = data[group].astype('category').cat.remove_unused_categories()
+    codes = groups.cat.codes.to_numpy()
+    x = data[value].to_numpy(dtype=float)
+    k = len(groups.cat.categories)
+
+    rows = []
+    for g, name in enumerate(groups.cat.categories):
+        xg = x[codes == g]
+        means = _run(partial(_bootstrap_means, xg), n_resamples,
+                     [seed, g], workers)
+        low, high = _interval(means, level)
+
+        rows.append({group: name, 'n': len(xg), 'moyenne': xg.mean(),
+                     'ic_bas': low, 'ic_haut': high})
+
+    table = pd.DataFrame(rows).set_index(group)
+
+    counts = np.bincount(codes, minlength=k)
+    observed = _between(np.bincount(codes, weights=x, minlength=k), counts, x.sum(), len(x))
+
+    if k > 1:
+        permuted = _run(partial(_permuted_between, x, codes, k), n_resamples, [seed, k], workers)
+        # Tolérance relative : égalités à l'arrondi près (e.g., permutation identité)
+        extreme = (permuted >= observed * (1 - 1e-12)).sum()
+        table['p_permutation'] = (1 + extreme) / (1 + n_resamples)
+    else:
+        table['p_permutation'] = np.nan
+
+    return table
+
+'''
+    Pente, ordonnée et R² de la régression linéaire de y sur x pour chaque
+    ligne des matrices X et Y (calcul vectorisé, sans boucle).
+'''
+def _regressions(X, Y):
+    mx = X.mean(axis=1, keepdims=True)
+    my = Y.mean(axis=1, keepdims=True)
+
+    sxy = ((X - mx) * (Y - my)).sum(axis=1)
+    sxx = ((X - mx)**2).sum(axis=1)
+    syy = ((Y - my)**2).sum(axis=1)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slope = sxy / sxx
+        r2 = sxy**2 / (sxx * syy)
+
+    return np.stack([slope, my[:, 0] - slope * mx[:, 0], r2], axis=1)
+
+def _bootstrap_regressions(x, y, size, seed):
+    rng = np.random.default_rng(seed)
+    idx = rng.integers(0, len(x), size=(size, len(x)))
+
+    return _regressions(x[idx], y[idx])
+
+def _permuted_slopes(x, y, size, seed):
+    rng = np.random.default_rng(seed)
+    Y = rng.permuted(np.broadcast_to(y, (size, len(y))), axis=1)
+
+    return _regressions(np.broadcast_to(x, Y.shape), Y)[:, 0]
+
+'''
+    Régression linéaire de `y` sur `x` (colonnes de df, lignes incomplètes
+    ignorées), avec intervalles de confiance bootstrap (rééchantillonnage des
+    couples (x, y)) de la pente, de l'ordonnée et du R², et p-valeur d'un
+    test de permutation de la pente (bilatéral).
+'''
+def regression(df, x='PAR', y='cond', n_resamples=N_RESAMPLES, level=LEVEL,
+               seed=0, workers=None):
+    data = df[[x, y]].dropna()
+    xs = data[x].to_numpy(dtype=float)
+    ys = data[y].to_numpy(dtype=float)
+
+    slope, intercept, r2 = _regressions(xs[None, :], ys[None, :])[0]
+
+    boot = _run(partial(_bootstrap_regressions, xs, ys), n_resamples, [seed, 0], workers)
+    (slope_low, intercept_low, r2_low), (slope_high, intercept_high, r2_high) = _interval(boot, level)
+
+    permuted = _run(partial(_permuted_slopes, xs, ys), n_resamples, [seed, 1], workers)
+    extreme = (np.abs(permuted) >= abs(slope) * (1 - 1e-12)).sum()
+
+    return pd.Series({'pente': slope, 'pente_ic_bas': slope_low, 'pente_ic_haut': slope_high,
+                      'ordonnee': intercept, 'ordonnee_ic_bas': intercept_low,
+                      'ordonnee_ic_haut': intercept_high,
+                      'r2': r2, 'r2_ic_bas': r2_low, 'r2_ic_haut': r2_high,
+                      'p_permutation': (1 + extreme) / (1 + n_resamples),
+                      'n': len(xs)})
@@ -0,0 +1,125 @@
+import numbers
+import operator
+
+import numpy as np
+import pandas as pd
+
+from loaders import frame_float_dtype
+
+'''
+    Lissage des séries par filtre médian glissant.
+
+    La fenêtre est soit un nombre d'échantillons (entier, comme le paramètre
+    `size` de scipy.ndimage.median_filter), soit une durée (e.g., '50min').
+
+    Avec un nombre d'échantillons, le filtre de scipy (fenêtre triée mise à
+    jour à chaque pas, en C) traite tout le tableau : sans NaN, le résultat
+    est exactement celui de df.apply(median_filter, size=...), y compris aux
+    extrémités (mode 'reflect'). Les fenêtres qui contiennent des NaN (trous
+    ajoutés par regularize.regularize, valeurs supprimées, ...) sont
+    recalculées en ignorant les NaN : la médiane est calculée sur les données
+    présentes dans la fenêtre.
+
+    Avec une durée, une période sans données (coupure du logger) ou un
+    échantillonnage irrégulier ne déforment pas la fenêtre ; tout le calcul
+    est fait par pandas.
+'''
+
+'''
+    Intervalle typique entre deux échantillons (médiane des écarts).
+'''
+def sampling_step(index):
+    return pd.Series(index).diff().median()
+
+'''
+    Convertit `window` en durée. Un entier (int, np.int64, ...) est
+    interprété comme un nombre d'échantillons : la fenêtre couvre alors
+    `window` échantillons réguliers.
+'''
+def as_window(index, window):
+    if isinstance(window, numbers.Integral):
+        return (operator.index(window) - 1) * sampling_step(index)
+
+    return pd.Timedelta(window)
+
+'''
+    Médiane de chaque fenêtre de `size` échantillons de `padded` (déjà
+    prolongé d'une demi-fenêtre de chaque côté) qui commence à la ligne
+    `rows`, colonne `cols`, en ignorant les NaN. Les fenêtres sont extraites
+    et triées par blocs de `block` pour limiter la mémoire.
+'''
+def _nan_medians(padded, rows, cols, size, block=65536):
+    out = np.empty(len(rows))
+    offsets = np.arange(size)
+
+    for start in range(0, len(rows), block):
+        r, c = rows[start:start + block], cols[start:start + block]
+
+        # np.sort range les NaN à la fin : les m valeurs présentes sont les
+        # m premières. Comme scipy, on prend la valeur de rang m // 2 (pour m
+        # pair, la plus grande des deux valeurs centrales)
+        windows = np.sort(padded[r[:, None] + offsets, c[:, None]], axis=1)
+        m = size - np.isnan(windows).sum(axis=1)
+
+        out[start:start + block] = np.take_along_axis(windows, (m // 2)[:, None], axis=1)[:, 0]
+
+    return out
+
+'''
+    Médiane glissante centrée de chaque colonne de df (ou d'une Series), sur
+    une fenêtre `window` (nombre d'échantillons, ou durée).
+
+    Les NaN sont ignorés : la médiane est calculée sur les données
+    disponibles dans la fenêtre (au moins `min_periods`, sinon NaN). Aux
+    extrémités, une fenêtre en nombre d'échantillons est complétée par
+    symétrie (mode 'reflect' de scipy) ; une fenêtre en durée est simplement
+    tronquée.
+
+    Avec un nombre d'échantillons, chaque colonne est filtrée par scipy (les
+    NaN remplacés par 0), puis seules les fenêtres qui contenaient un NaN
+    sont recalculées : les m valeurs présentes de la fenêtre sont triées et
+    on prend celle de rang m // 2, comme scipy (pour m pair, la plus grande
+    des deux valeurs centrales, et non leur moyenne comme np.nanmedian). Le
+    coût reste celui de scipy tant que les NaN sont rares.
+'''
+def rolling_median(df, window, min_periods=1):
+    if not isinstance(window, numbers.Integral):
+        return df.rolling(pd.Timedelta(window), center=True, closed='both',
+                          min_periods=min_periods).median()
+
+    size = operator.index(window)
+    half = size // 2
+
+    frame = df.to_frame() if isinstance(df, pd.Series) else df
+
+    # float32 pour les données compactes (voir loaders.to_compact)
+    values = frame.to_numpy(dtype=frame_float_dtype(frame))
+    missing = np.isnan(values)
+
+    # Import différé : scipy.ndimage n'est chargé qu'au premier filtrage
+    from scipy.ndimage import median_filter
+
+    # Colonne par colonne : scipy n'utilise son filtre 1D rapide que sur des
+    # tableaux 1D (size=(size, 1) sur le tableau 2D est bien plus lent)
+    filled = np.where(missing, 0, values)
+    out = np.empty_like(values)
+    for j in range(values.shape[1]):
+        out[:, j] = median_filter(filled[:, j], size=size, mode='reflect')
+
+    if missing.any():
+        # Nombre de NaN dans chaque fenêtre (sommes cumulées sur le masque
+        # prolongé par symétrie, comme les données)
+        padded_missing = np.pad(missing, ((half, half), (0, 0)), mode='symmetric')
+        counts = np.zeros((len(padded_missing) + 1, values.shape[1]), dtype=np.int64)
+        np.cumsum(padded_missing, axis=0, out=counts[1:])
+        nans = counts[size:size + len(values)] - counts[:len(values)]
+
+        rows, cols = np.nonzero(nans > 0)
+        padded = np.pad(values, ((half, half), (0, 0)), mode='symmetric')
+        out[rows, cols] = _nan_medians(padded, rows, cols, size)
+
+        out[size - nans < min_periods] = np.nan
+
+    result = pd.DataFrame(out, index=frame.index, columns=frame.columns)
+
+    return result.iloc[:, 0].rename(df.name) if isinstance(df, pd.Series) else result
@@ -0,0 +1,128 @@
+import numpy as np
+import pandas as pd
+
+from corrections import apply_corrections
+
+'''
+    Détection automatique des sauts dans les séries des balances (arrosages,
+    balances qui sautent) et des encodeurs (pinces qui lâchent, poulies qui
+    patinent).
+
+    Principe :
+        1. on calcule la différence entre deux échantillons successifs ;
+        2. on estime le bruit "normal" de ces différences de manière robuste
+           (écart absolu médian, insensible aux quelques sauts ; voir _scale
+           pour les séries quantifiées comme celles des encodeurs) ;
+        3. les différences qui dépassent `k` fois ce bruit sont des candidats,
+           les candidats proches sont regroupés en un seul saut ;
+        4. l'amplitude du saut est estimée par la différence entre les
+           médianes de `window` échantillons après et avant le saut. Un pic
+           isolé (glitch) donne une amplitude quasi nulle et est écarté.
+
+    Le tout est linéaire en la longueur de la série. Les sauts détectés sont
+    renvoyés sous la forme d'une table de corrections (voir corrections.py),
+    ce qui permet de les vérifier, de les copier dans data/corrections.csv,
+    ou de les appliquer directement.
+'''
+
+'''
+    Regroupe les positions triées `pos` séparées de moins de `gap`
+    échantillons. Renvoie les positions de début et de fin de chaque groupe.
+'''
+def _runs(pos, gap):
+    if len(pos) == 0:
+        return pos, pos
+
+    breaks = np.flatnonzero(np.diff(pos) > gap)
+
+    return pos[np.r_[0, breaks + 1]], pos[np.r_[breaks, len(pos) - 1]]
+
+# Quantile des écarts utilisé quand l'écart absolu médian est nul, et valeur
+# de ce quantile pour une loi normale centrée réduite (|N(0, 1)|)
+QUANTILE = 0.99
+QUANTILE_Z = 2.5758
+
+'''
+    Ecart-type robuste des différences `d` (sans NaN).
+
+    Les séries quantifiées (encodeurs : un pas de 1/80ème de tour de poulie,
+    balances peu sollicitées) ont une majorité de différences nulles :
+    l'écart absolu médian vaut alors 0, et chaque pas de quantification
+    serait un saut. Dans ce cas, l'écart-type est estimé à partir du
+    quantile QUANTILE des écarts, et vaut au moins le pas de quantification
+    (plus petit écart non nul).
+'''
+def _scale(d):
+    dev = np.abs(d - np.median(d))
+    mad = np.median(dev)
+
+    if mad > 0:
+        return 1.4826 * mad
+
+    nonzero = dev[dev > 0]
+    if len(nonzero) == 0:
+        return 0.0
+
+    return max(np.quantile(dev, QUANTILE) / QUANTILE_Z, nonzero.min())
+
+def _detect_col(s, k, window, gap, min_step):
+    values = s.to_numpy(dtype=float)
+    d = np.diff(values)
+
+    valid = d[~np.isnan(d)]
+    if len(valid) == 0:
+        return []
+
+    threshold = max(k * _scale(valid), min_step)
+
+    with np.errstate(invalid='ignore'):
+        first, last = _runs(np.flatnonzero(np.abs(d) > threshold), gap)
+
+    steps = []
+    for i, j in zip(first, last):
+        # Le saut a lieu entre les échantillons i et j+1
+        before = np.nanmedian(values[max(0, i + 1 - window):i + 1])
+        after = np.nanmedian(values[j + 1:j + 1 + window])
+
+        if abs(after - before) > threshold:
+            steps.append((s.name, s.index[j + 1], before, after))
+
+    return steps
+
+'''
+    Détecte les sauts de chaque colonne de df.
+
+    Renvoie une table de corrections (type 'decalage') qui annule chaque saut :
+    'valeur' est le niveau avant le saut, 'reference' le niveau après.
+
+    Paramètres :
+        - k : seuil, en nombre d'écarts-types robustes des différences ;
+        - window : nombre d'échantillons de part et d'autre pour estimer le saut ;
+        - gap : nombre d'échantillons en dessous duquel deux candidats
+          appartiennent au même saut ;
+        - min_step : amplitude minimale d'un saut (dans l'unité des données).
+'''
+def detect_steps(df, k=10, window=5, gap=3, min_step=0):
+    if isinstance(df, pd.Series):
+        df = df.to_frame()
+
+    steps = []
+    for col in df.columns:
+        steps += _detect_col(df[col], k, window, gap, min_step)
+
+    table = pd.DataFrame(steps, columns=['colonne', 'debut', 'valeur', 'reference'])
+
+    table['type'] = 'decalage'
+    table['fin'] = pd.NaT
+    table['saut'] = table['reference'] - table['valeur']
+
+    return table.sort_values('debut', ignore_index=True)
+
+'''
+    Détecte les sauts de df et les annule. Renvoie les données corrigées et
+    la table des sauts détectés.
+'''
+def remove_steps(df, **kwargs):
+    table = detect_steps(df, **kwargs)
+
+    return apply_corrections(df, table=table), table
@@ -0,0 +1,166 @@
+import numbers
+import operator
+
+import numpy as np
+import pandas as pd
+
+from loaders import READ_OPTIONS, data_path, parse_rows, schema
+from pipelines import prepare_balances, prepare_croissance
+from smoothing import rolling_median
+
+'''
+    Lecture et traitement "en flux" des fichiers des data loggers.
+
+    Plutôt que de charger toute une campagne en mémoire, le fichier est lu par
+    morceaux (chunks) de quelques milliers de lignes. Chaque morceau est
+    préparé (changement de signe, corrections, conversion en cm, voir
+    pipelines.py), filtré par un filtre médian qui tient compte des morceaux
+    voisins, puis les journées terminées sont renvoyées au fur et à mesure.
+    La mémoire utilisée est ainsi limitée à un morceau et une journée de
+    données, quelle que soit la durée de la campagne.
+'''
+
+'''
+    Lit le fichier de `instrument` pour la campagne `year` par morceaux de
+    `chunksize` lignes, indexés par le temps.
+'''
+def read_chunks(instrument, year, chunksize=5000):
+    s = schema(instrument, year)
+
+    with pd.read_csv(data_path(instrument, year), chunksize=chunksize,
+                     **READ_OPTIONS[instrument]) as reader:
+        for chunk in reader:
+            yield parse_rows(chunk, instrument, s)
+
+'''
+    Médiane glissante (voir smoothing.rolling_median) appliquée à des morceaux
+    successifs d'une même série.
+
+    Une ligne n'est renvoyée que lorsque toute sa fenêtre (une demi-fenêtre de
+    part et d'autre, en nombre d'échantillons ou en durée selon `window`) est
+    connue. Les dernières lignes de chaque morceau sont gardées en mémoire et
+    complétées par le morceau suivant, si bien que le résultat est identique
+    à celui obtenu sur le fichier complet.
+'''
+class StreamingMedian:
+    def __init__(self, window):
+        self.window = window
+
+        # Demi-fenêtre : nombre d'échantillons, ou durée
+        if isinstance(window, numbers.Integral):
+            self.half = operator.index(window) // 2
+        else:
+            self.half = pd.Timedelta(window) / 2
+
+        # Lignes en attente, précédées des lignes déjà renvoyées qui ne servent
+        # plus que de contexte pour la fenêtre
+        self.buffer = None
+        self.last_emitted = None
+
+    def _counted(self):
+        return isinstance(self.window, numbers.Integral)
+
+    def _pending(self, buffer):
+        if self.last_emitted is None:
+            return np.ones(len(buffer), dtype=bool)
+
+        return buffer.index > self.last_emitted
+
+    def _emit(self, buffer, ready):
+        out = rolling_median(buffer, self.window)[ready]
+
+        if len(out) > 0:
+            self.last_emitted = out.index[-1]
+
+        return out
+
+    def push(self, chunk):
+        buffer = chunk if self.buffer is None else pd.concat([self.buffer, chunk])
+
+        if len(buffer) == 0:
+            self.buffer = buffer
+            return buffer
+
+        pending = self._pending(buffer)
+
+        if self._counted():
+            ready = pending & (np.arange(len(buffer)) < len(buffer) - self.half)
+        else:
+            ready = pending & (buffer.index <= buffer.index[-1] - self.half)
+
+        out = self._emit(buffer, ready)
+
+        # On garde les lignes en attente et une demi-fenêtre de contexte
+        waiting = np.flatnonzero(pending & ~ready)
+        first = waiting[0] if len(waiting) > 0 else len(buffer) - 1
+
+        if self._counted():
+            self.buffer = buffer.iloc[max(0, first - self.half):]
+        else:
+            self.buffer = buffer[buffer.index >= buffer.index[first] - self.half]
+
+        return out
+
+    def flush(self):
+        if self.buffer is None or len(self.buffer) == 0:
+            return None
+
+        out = self._emit(self.buffer, self._pending(self.buffer))
+        self.buffer = None
+
+        return out
+
+'''
+    Regroupe les lignes reçues par journée : une journée est considérée comme
+    terminée dès qu'une ligne d'une journée suivante arrive.
+'''
+class DayBuffer:
+    def __init__(self):
+        self.buffer = None
+
+    def push(self, rows):
+        buffer = rows if self.buffer is None else pd.concat([self.buffer, rows])
+
+        if len(buffer) == 0:
+            self.buffer = buffer
+            return []
+
+        day = buffer.index.normalize()
+        last = day[-1]
+
+        done = buffer[day < last]
+        self.buffer = buffer[day == last]
+
+        return [(d, g) for d, g in done.groupby(done.index.normalize())]
+
+    def flush(self):
+        buffer, self.buffer = self.buffer, None
+
+        if buffer is None or len(buffer) == 0:
+            return []
+
+        return [(d, g) for d, g in buffer.groupby(buffer.index.normalize())]
+
+'''
+    Enchaîne préparation (prepare(chunk, year)), filtrage médian et découpage
+    par journée sur une suite de morceaux. Renvoie les journées (date,
+    DataFrame filtré) dès qu'elles sont complètes.
+'''
+def stream_days(chunks, prepare, year, window):
+    median = StreamingMedian(window)
+    days = DayBuffer()
+
+    for chunk in chunks:
+        yield from days.push(median.push(prepare(chunk, year)))
+
+    rows = median.flush()
+    if rows is not None:
+        yield from days.push(rows)
+
+    yield from days.flush()
+
+def stream_croissance(year, chunksize=5000, window=51):
+    return stream_days(read_chunks('croissance', year, chunksize), prepare_croissance, year, window)
+
+def stream_balances(year, chunksize=5000, window=21):
+    return stream_days(read_chunks('balances', year, chunksize), prepare_balances, year, window)
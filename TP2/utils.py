@@ -1,63 +1,213 @@
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
+import numbers
 
 import pandas as pd
 
 import numpy as np
 
-from datetime import timedelta
+from loaders import as_float, float_dtype
+from regularize import sampling_period as detect_sampling_period
+
+# matplotlib n'est importé qu'au premier appel d'une fonction plot_* : les
+# calculs (daily_*, pipelines, batch, ...) n'en paient pas le coût de
+# chargement (voir benchmarks.py startup).
+
+'''
+    Positions (i, j) des dates de `time` (triées) comprises entre `start` et
+    `end` inclus, par recherche dichotomique : time[i:j] correspond à
+    df[start:end] avec pandas. None = depuis le début / jusqu'à la fin, et
+    une date sans heure ('2026-02-12') désigne toute la journée.
+'''
+def positions(time, start=None, end=None):
+    time = np.asarray(time)
+
+    def position(date, side):
+        whole_day = isinstance(date, str) and len(date) == 10
+
+        date = pd.Timestamp(date)
+        if side == 'right' and whole_day:
+            date += pd.Timedelta(days=1)
+            side = 'left'
+
+        return int(np.searchsorted(time, date.to_datetime64().astype(time.dtype), side=side))
+
+    i = 0 if start is None else position(start, 'left')
+    j = len(time) if end is None else position(end, 'right')
+
+    return i, j
+
+'''
+    Découpage d'une série temporelle triée en journées, calculé une seule
+    fois : pour chaque journée, les positions (start, stop) de ses
+    échantillons. Les traitements par journée ou par intervalle (feuilles,
+    corrections, ...) utilisent ensuite des tranches d'entiers (x.iloc[...])
+    au lieu de reformater des dates et de chercher des étiquettes.
+
+        days = DayIndex(df.index)
+        for day, rows in days:
+            df.iloc[rows] ...
+        df.iloc[days.between("2026-01-28", "2026-01-31")]
+'''
+class DayIndex:
+    def __init__(self, index):
+        self.time = index.to_numpy()
+
+        day = self.time.astype('datetime64[D]')
+        self.starts = np.flatnonzero(np.r_[True, day[1:] != day[:-1]])
+        self.stops = np.r_[self.starts[1:], len(day)]
+        self.days = pd.DatetimeIndex(day[self.starts].astype(self.time.dtype))
+
+    def __len__(self):
+        return len(self.days)
+
+    def __iter__(self):
+        for day, start, stop in zip(self.days, self.starts, self.stops):
+            yield day, slice(start, stop)
+
+    def day(self, date):
+        k = self.days.get_loc(pd.Timestamp(date).normalize())
+
+        return slice(self.starts[k], self.stops[k])
+
+    def between(self, start=None, end=None):
+        return slice(*positions(self.time, start, end))
+
+    '''
+        Numéro de journée de chaque échantillon.
+    '''
+    def codes(self):
+        return np.repeat(np.arange(len(self.days)), self.stops - self.starts)
+
+# Statistiques journalières calculées directement sur les tranches de DayIndex
+# (NaN ignorés, comme avec pandas)
+_REDUCE = {'min': np.fmin, 'max': np.fmax}
+
+'''
+    Regroupe les échantillons par journée calendaire : renvoie, pour chaque
+    ligne de x (Series ou DataFrame), la statistique `how` ('min', 'max', ...)
+    de sa journée. Le calcul se fait en une seule passe au lieu d'une boucle
+    Python sur les jours : pour 'min' et 'max' sur une série triée, par
+    réduction sur les tranches de DayIndex, sinon par groupby + transform.
+'''
+def daily_transform(x, how, days=None):
+    if how not in _REDUCE or not x.index.is_monotonic_increasing or len(x) == 0:
+        return x.groupby(x.index.normalize()).transform(how)
+
+    days = DayIndex(x.index) if days is None else days
+
+    values = x.to_numpy()
+    per_day = _REDUCE[how].reduceat(values, days.starts, axis=0)
+    out = np.repeat(per_day, days.stops - days.starts, axis=0)
+
+    if isinstance(x, pd.Series):
+        return pd.Series(out, index=x.index, name=x.name)
+
+    return pd.DataFrame(out, index=x.index, columns=x.columns)
 
 '''
     Transforme une donnée cumulée sur plusieurs jours (e.g., transpiration
     cumulée) en une donnée cumulée journalière : chaque journée redémarre à 0.
-'''
-def daily_reset(col):
-    df = pd.Series(index=col.index)
-    
-    days = np.unique(col.index.date)
     
-    for day in days:
-        idx = day.strftime('%Y-%m-%d')
-        
-        df.loc[idx] = col[idx] - min(col[idx])
-        
-    return df
+    Fonctionne sur une colonne (Series) ou sur un DataFrame complet.
+'''
+def daily_reset(x):
+    return x - daily_transform(x, 'min')
         
 '''
     Normalise une donnée cumulée sur une journée (e.g., transpiration journalière
     cumulée) en une donnée cumulée normalisée. L'unité devient "% du total journalier".
-'''
-def daily_normalize(col):
-    df = pd.Series(index=col.index)
-    
-    days = np.unique(col.index.date)
     
-    for day in days:
-        idx = day.strftime('%Y-%m-%d')
-        
-        df.loc[idx] = col[idx]/max(col[idx]) * 100
-        
-    return df
+    Fonctionne sur une colonne (Series) ou sur un DataFrame complet.
+'''
+def daily_normalize(x):
+    x = as_float(x)
+
+    return x / daily_transform(x, 'max') * 100
+
+# Réduction des séries affichées (voir decimate) ; False pour tout tracer
+DECIMATE = True
+
+'''
+    Réduit une série (Series) à ce qui est visible à l'écran : l'axe du temps
+    est découpé en `pixels` colonnes et, dans chaque colonne, on ne garde que
+    le premier, le dernier, le minimum et le maximum (réduction min/max par
+    pixel, dite "M4"). La courbe tracée est la même que celle de la série
+    complète, avec au plus 4 x `pixels` points, quelle que soit la durée de
+    la campagne.
+
+    Une colonne ne contenant que des NaN garde un NaN, pour que les trous
+    restent visibles. Le calcul est vectorisé (réductions par colonne de
+    pixels sur la série triée).
+'''
+def decimate(s, pixels):
+    if len(s) <= 4 * pixels:
+        return s
+
+    t = s.index.to_numpy().astype(np.int64).astype(float)
+    v = s.to_numpy(dtype=float)
+
+    bucket = np.minimum(((t - t[0]) / max(t[-1] - t[0], 1) * pixels).astype(np.int64), pixels - 1)
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+    b = np.repeat(np.arange(len(starts)), np.diff(np.r_[starts, len(v)]))
+
+    # Premier et dernier échantillon de chaque colonne : les segments qui
+    # relient deux colonnes voisines sont ainsi tracés exactement
+    keep = np.zeros(len(v), dtype=bool)
+    keep[starts] = True
+    keep[np.r_[starts[1:] - 1, len(v) - 1]] = True
+
+    for extremum in (np.fmin.reduceat(v, starts), np.fmax.reduceat(v, starts)):
+        # Première position de chaque colonne où l'extremum est atteint
+        pos = np.flatnonzero(v == extremum[b])
+        _, first = np.unique(b[pos], return_index=True)
+        keep[pos[first]] = True
+
+        keep[starts[np.isnan(extremum)]] = True
+
+    return s[keep]
+
+'''
+    Nombre de pixels de la largeur de la zone de tracé de `ax`.
+'''
+def _pixels(ax):
+    return max(int(ax.get_window_extent().width), 1)
+
+# Deux colonnes par pixel : le lissage des bords des traits (antialiasing)
+# reste alors pratiquement identique à celui de la série complète
+def _visible(s, ax):
+    return decimate(s, 2 * _pixels(ax)) if DECIMATE else s
+
+'''
+    Une graduation par journée, calculée sur les journées (DayIndex) et non
+    sur chaque échantillon. Sur de longues campagnes, on ne garde qu'une
+    journée sur `step` pour que les étiquettes (au moins `spacing` pixels
+    chacune) restent lisibles.
+'''
+def _day_ticks(ax, index, spacing=20):
+    days = DayIndex(index).days
+    step = -(-len(days) * spacing // _pixels(ax))
+
+    days = days[::max(step, 1)]
+    ax.set_xticks(days, labels=days.strftime('%d-%m'))
 
 def plot_series(s, title, ylabel):
+    import matplotlib.pyplot as plt
+
     fig, ax = plt.subplots(figsize=(8,4))
 
-    days = np.unique(s.index.date)
-    
-    for day in days:
-        ax.plot(s[day.strftime('%Y-%m-%d')], color='blue')
+    visible = _visible(s, ax)
+
+    for _, rows in DayIndex(visible.index):
+        ax.plot(visible.iloc[rows], color='blue')
     
     ax.set_title(title, pad=15)
     ax.set_ylabel(ylabel)
     
     ax.spines[["top", "right"]].set_visible(False)
 
-    print(s)
-    print(s.max())
     ax.set_ylim(bottom=0, top=s.max())
 
     ax.set_xlim(left=s.index.min(), right=s.index.max())
-    ax.set_xticks(np.unique(s.index.date), labels=s.index.strftime('%d-%m').unique())
+    _day_ticks(ax, s.index)
 
     ax.tick_params(axis='both', which='major', labelsize=9)
 
@@ -72,6 +222,8 @@ def plot_cols_separate(df, title, ylabel):
                     ylabel=ylabel)
 
 def plot_cols(df, title, ylabel, labels=None, colors=None, linestyles=None, bottom=0):
+    import matplotlib.pyplot as plt
+
     cols = df.columns.tolist()
     
     if labels is None:
@@ -86,7 +238,7 @@ def plot_cols(df, title, ylabel, labels=None, colors=None, linestyles=None, bott
     fig, ax = plt.subplots(figsize=(8,4))
     
     for i, col in enumerate(cols):
-        ax.plot(df[col],
+        ax.plot(_visible(df[col], ax),
                 label=labels[i],
                 color=colors[i],
                 linestyle=linestyles[i])
@@ -96,10 +248,10 @@ def plot_cols(df, title, ylabel, labels=None, colors=None, linestyles=None, bott
     
     ax.spines[["top", "right"]].set_visible(False)
 
-    ax.set_ylim(bottom=bottom, top=df.to_numpy().max())
+    ax.set_ylim(bottom=bottom, top=np.nanmax(df.to_numpy()))
 
     ax.set_xlim(left=df.index.min(), right=df.index.max())
-    ax.set_xticks(np.unique(df.index.date), labels=df.index.strftime('%d-%m').unique())
+    _day_ticks(ax, df.index)
 
     ax.tick_params(axis='both', which='major', labelsize=6)
 
@@ -110,47 +262,107 @@ def plot_cols(df, title, ylabel, labels=None, colors=None, linestyles=None, bott
 
     plt.show()
 
-def plot_col_daily(df, col, sampling_period, title):
-    days = np.unique(df.index.date)
+'''
+    Replace une série (ou chaque colonne d'un DataFrame) sur une grille
+    régulière "journées x créneaux horaires" : une ligne par journée, une
+    colonne par créneau de `sampling_period` (en minutes, ou une durée)
+    depuis minuit. Par défaut, la période d'échantillonnage est détectée.
     
-    # Nombre d'échantillon dans une journée
-    N = int(24*60/sampling_period)
+    Chaque échantillon est rangé dans le créneau qui le contient, en une seule
+    opération. Si plusieurs échantillons tombent dans le même créneau, le
+    créneau vaut leur moyenne (NaN ignorés). Les créneaux sans mesure valent
+    NaN (aucun remplissage).
+    Pour un DataFrame, les lignes sont indexées par (colonne, journée).
+    La période doit diviser la journée (e.g., 7 min est refusé) : sinon le
+    dernier créneau déborderait sur la journée suivante.
+'''
+def daily_grid(x, sampling_period=None):
+    if sampling_period is None:
+        period = detect_sampling_period(x.index)
+    elif isinstance(sampling_period, numbers.Real):
+        period = pd.Timedelta(minutes=float(sampling_period))
+    else:
+        period = pd.Timedelta(sampling_period)
     
-    fig, ax = plt.subplots(figsize=(8,4))
+    if period <= pd.Timedelta(0) or pd.Timedelta(days=1) % period != pd.Timedelta(0):
+        raise ValueError("La période {p} ne divise pas une journée".format(p=period))
     
-    average = 0
-    for i, day in enumerate(days):
-        df_day = df[col][day.strftime('%Y-%m-%d')]
+    # Nombre de créneaux dans une journée
+    N = int(pd.Timedelta(days=1) / period)
+    
+    day = x.index.normalize()
+    days, d = np.unique(day, return_inverse=True)
+    slot = np.asarray((x.index - day) // period)
+    slots = pd.timedelta_range(start=0, periods=N, freq=period)
+    
+    values = x.to_numpy().reshape(len(x), -1).T
+    
+    grid = np.full((values.shape[0], len(days), N), np.nan, dtype=float_dtype(values.dtype))
+    
+    key = d * N + slot
+    if np.unique(key).size == key.size:
+        grid[:, d, slot] = values
+    else:
+        # Créneaux en double : moyenne par créneau, toutes les colonnes en
+        # un seul np.bincount (un bloc de len(days) * N créneaux par colonne)
+        size = len(days) * N
+        keys = (key + size * np.arange(values.shape[0])[:, None]).ravel()
+        flat = values.ravel().astype(float)
+        present = ~np.isnan(flat)
         
-        ax.plot(df_day.index - timedelta(days=i), df_day, color='blue', alpha=0.2)  
+        sums = np.bincount(keys[present], weights=flat[present], minlength=grid.size)
+        counts = np.bincount(keys[present], minlength=grid.size)
         
-        if len(df_day) < N:
-            print("Day: {d}, sample size is {Nr} (should be {N}).".format(d=day.strftime('%Y-%m-%d'),
-                                                                         Nr=len(df_day),
-                                                                         N=N))
-            print("Padding the edges.")
-            
-            pad_length = (N - len(df_day))
-
-            if pad_length % 2 == 0:
-                pad = (pad_length//2, pad_length//2)
-            else:
-                pad = (0, pad_length)
-            
-            average += np.pad(df_day.to_numpy(), pad, mode='edge')
-        else:
-            average += df_day.to_numpy()
-
-    ax.plot(pd.date_range(start=days[0], end=days[0] + timedelta(days=1), periods=N),
-            average/len(days),
-            color='blue', linewidth=3, label="Moyenne")
+        with np.errstate(invalid='ignore'):
+            grid[...] = (sums / counts).reshape(grid.shape)
+    
+    if isinstance(x, pd.Series):
+        return pd.DataFrame(grid[0], index=days, columns=slots)
+    
+    return pd.DataFrame(grid.reshape(-1, N),
+                        index=pd.MultiIndex.from_product([x.columns, days]),
+                        columns=slots)
+
+'''
+    Profil journalier moyen : pour chaque créneau horaire, moyenne, médiane
+    et quantiles (enveloppe) sur toutes les journées de la grille renvoyée
+    par daily_grid(). Les créneaux manquants sont ignorés.
+'''
+def daily_profile(x, sampling_period=None, quantiles=(0.25, 0.75)):
+    return grid_profile(daily_grid(x, sampling_period), quantiles)
+
+'''
+    Profil journalier d'une grille déjà calculée par daily_grid().
+'''
+def grid_profile(grid, quantiles=(0.25, 0.75)):
+    profile = pd.DataFrame({'mean': grid.mean(), 'median': grid.median()})
+    
+    for q in quantiles:
+        profile['q{q:g}'.format(q=q*100)] = grid.quantile(q)
+    
+    return profile
+
+def plot_col_daily(df, col, sampling_period, title):
+    import matplotlib.pyplot as plt
+    import matplotlib.dates as mdates
+
+    grid = daily_grid(df[col], sampling_period)
+    profile = grid_profile(grid)
+    
+    # Toutes les journées sont superposées sur la première
+    t = grid.index[0] + grid.columns
+    
+    fig, ax = plt.subplots(figsize=(8,4))
+    
+    ax.plot(t, grid.to_numpy().T, color='blue', alpha=0.2)
+    ax.plot(t, profile['mean'], color='blue', linewidth=3, label="Moyenne")
     
     ax.set_title(title)
     ax.set_ylabel("%")
 
     ax.spines[["top", "right"]].set_visible(False)
 
-    ax.set_ylim(bottom=0, top=df[col].to_numpy().max())
+    ax.set_ylim(bottom=0, top=np.nanmax(df[col].to_numpy()))
     ax.xaxis.set_major_formatter(mdates.DateFormatter('%H:%M'))
     ax.tick_params(axis='both', which='major', labelsize=9)
 